@@ -1,6 +1,7 @@
 """Init file for condoor."""
 
 from condoor.connection import Connection
+from condoor.fleet import Fleet
 from condoor.config import CONF
 from condoor.patterns import YPatternManager as PatternManager
 
@@ -19,7 +20,7 @@ This is a python module providing access to Cisco devices over Telnet and SSH.
 
 """
 
-__all__ = ('Connection', 'TIMEOUT', 'EOF', 'pattern_manager', 'CONF', 'InvalidHopInfoError',
+__all__ = ('Connection', 'Fleet', 'TIMEOUT', 'EOF', 'pattern_manager', 'CONF', 'InvalidHopInfoError',
            'CommandTimeoutError', 'ConnectionError', 'ConnectionTimeoutError', 'CommandError',
            'CommandSyntaxError', 'ConnectionAuthenticationError', 'GeneralError', 'ConfigurationErrors',
            'ConfigurationSemanticErrors', '__version__')
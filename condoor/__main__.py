@@ -70,16 +70,19 @@ log_levels = {
               help="Log terminal session.")
 @click.option("--force-discovery", is_flag=True,
               help="Force full device discovery.")
+@click.option("--discovery", type=click.Choice(["minimal", "standard", "full"]),
+              show_default=True, default='full',
+              help="The device information collected after connecting.")
 @click.option("--cmd", multiple=True, default=[],
               help='The command to be send to the device. The --cmd option can be repeated multiple times.')
 @click.option("--print-info", is_flag=True,
               help="Print the discovered information.")
-def run(url, cmd, log_path, log_level, log_session, force_discovery, print_info):
+def run(url, cmd, log_path, log_level, log_session, force_discovery, discovery, print_info):
     """Run the main function."""
     log_level = log_levels[log_level]
     conn = condoor.Connection("host", list(url), log_session=log_session, log_level=log_level, log_dir=log_path)
     try:
-        conn.connect(force_discovery=force_discovery)
+        conn.connect(force_discovery=force_discovery, discovery=discovery)
         if print_info:
             echo_info(conn)
 
@@ -0,0 +1,229 @@
+"""Provides the discovery cache backends shared by the connections."""
+
+import fcntl
+import shelve
+import sys
+import threading
+import time
+import cPickle as pickle
+from contextlib import contextmanager
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+
+class CacheBackend(object):
+    """The base class for the discovery cache backends.
+
+    The records are stored under the string key. The ``get`` method raises KeyError if the record does not
+    exist or has expired. The methods are called by many threads and processes at the same time, so the
+    derived classes must not keep the open files or database connections between the calls.
+    """
+
+    suffix = ""
+
+    def __init__(self, path, ttl=0, max_entries=0, lock_timeout=30):
+        """Initialize the CacheBackend object.
+
+        Args:
+            path (str): The cache file name without the backend specific suffix.
+            ttl (int): The default time in seconds after which the record expires. 0 means never.
+            max_entries (int): The maximum number of records kept. The least recently used are removed first.
+                0 means no limit.
+            lock_timeout (int): The time in seconds to wait for the lock held by the other writer.
+        """
+        self.filename = path + self.suffix
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock_timeout = lock_timeout
+
+    def get(self, key):
+        """Return the record stored under the key. Raise KeyError if not found or expired."""
+        raise NotImplementedError("Cache get not implemented")
+
+    def set(self, key, value, ttl=None):
+        """Store the record under the key. The ttl overrides the default time to live."""
+        raise NotImplementedError("Cache set not implemented")
+
+    def delete(self, key):
+        """Remove the record stored under the key if exists."""
+        raise NotImplementedError("Cache delete not implemented")
+
+    def __len__(self):
+        """Return the number of records which have not expired."""
+        raise NotImplementedError("Cache len not implemented")
+
+    def _expires(self, ttl):
+        if ttl is None:
+            ttl = self.ttl
+        return time.time() + ttl if ttl else None
+
+
+class SQLiteCache(CacheBackend):
+    """The cache stored in the SQLite database in the write-ahead log mode.
+
+    The readers do not block each other nor the writer, and the writers from the other threads and
+    processes wait for the database lock up to lock_timeout seconds. The database is recreated if created
+    with a different schema version.
+    """
+
+    SCHEMA_VERSION = 1
+    suffix = ".sqlite"
+
+    def get(self, key):
+        """Return the record stored under the key. Raise KeyError if not found or expired."""
+        with self._connect() as db:
+            row = db.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] < time.time()):
+                raise KeyError(key)
+            if self.max_entries:
+                db.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(str(row[0]))
+
+    def set(self, key, value, ttl=None):
+        """Store the record under the key and remove the expired and least recently used records."""
+        data = sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                       (key, data, self._expires(ttl), now))
+            db.execute("DELETE FROM cache WHERE expires < ?", (now,))
+            if self.max_entries:
+                db.execute("DELETE FROM cache WHERE key IN "
+                           "(SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def delete(self, key):
+        """Remove the record stored under the key if exists."""
+        with self._transaction() as db:
+            db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def __len__(self):
+        """Return the number of records which have not expired."""
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM cache WHERE expires IS NULL OR expires >= ?",
+                              (time.time(),)).fetchone()[0]
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.filename, timeout=self.lock_timeout, isolation_level=None)
+        try:
+            db.execute("PRAGMA synchronous = NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                self._create_schema(db)
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as db:
+            # take the write lock upfront, so the concurrent writers wait for the busy timeout instead of
+            # failing on the lock upgrade
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _create_schema(self, db):
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # the other process might have created the schema while waiting for the lock
+            if db.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                db.execute("DROP TABLE IF EXISTS cache")
+                db.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, "
+                           "accessed REAL NOT NULL)")
+                db.execute("CREATE INDEX cache_accessed ON cache (accessed)")
+                db.execute("PRAGMA user_version = {}".format(self.SCHEMA_VERSION))
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+
+class ShelveCache(CacheBackend):
+    """The cache stored in the shelve database file.
+
+    The dbm files do not support the concurrent access, so the threads are serialized with the lock and the
+    processes with the advisory lock on the separate lock file. The max_entries and lock_timeout are not
+    supported.
+    """
+
+    _lock = threading.Lock()
+
+    def get(self, key):
+        """Return the record stored under the key. Raise KeyError if not found or expired."""
+        with self._open('r') as cache:
+            entry = cache[key]
+        if not isinstance(entry, tuple) or (entry[0] is not None and entry[0] < time.time()):
+            raise KeyError(key)
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store the record under the key."""
+        with self._open('c') as cache:
+            cache[key] = (self._expires(ttl), value)
+
+    def delete(self, key):
+        """Remove the record stored under the key if exists."""
+        with self._open('c') as cache:
+            cache.pop(key, None)
+
+    def __len__(self):
+        """Return the number of records which have not expired."""
+        now = time.time()
+        with self._open('r') as cache:
+            return sum(1 for entry in cache.values()
+                       if isinstance(entry, tuple) and (entry[0] is None or entry[0] >= now))
+
+    @contextmanager
+    def _open(self, mode):
+        with self._lock:
+            with open(self.filename + ".lock", "a") as lock_fd:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)  # released on close
+                cache = shelve.open(self.filename, mode, protocol=pickle.HIGHEST_PROTOCOL)
+                try:
+                    yield cache
+                finally:
+                    cache.close()
+
+
+_BACKENDS = {
+    'sqlite': SQLiteCache,
+    'shelve': ShelveCache,
+}
+
+
+def make_cache(backend, path, ttl=0, max_entries=0, lock_timeout=30):
+    """Return the cache backend object.
+
+    Args:
+        backend (str): The backend name: 'sqlite' or 'shelve', or the dotted path to the
+            :class:`condoor.cache.CacheBackend` derived class, i.e. 'mypackage.mymodule.RedisCache'.
+            The 'shelve' backend is used if the sqlite3 module is not available.
+        path (str): The cache file name without the backend specific suffix.
+        ttl (int): The default time in seconds after which the record expires. 0 means never.
+        max_entries (int): The maximum number of records kept. 0 means no limit.
+        lock_timeout (int): The time in seconds to wait for the lock held by the other writer.
+
+    Returns:
+        The :class:`condoor.cache.CacheBackend` object.
+    """
+    if backend == 'sqlite' and sqlite3 is None:
+        backend = 'shelve'
+
+    backend_class = _BACKENDS.get(backend)
+    if backend_class is None:
+        module_str, _, class_name = backend.rpartition('.')
+        try:
+            __import__(module_str)
+            backend_class = getattr(sys.modules[module_str], class_name)
+        except (ImportError, AttributeError, ValueError):
+            raise ValueError("Unknown cache backend: {}".format(backend))
+
+    return backend_class(path, ttl=ttl, max_entries=max_entries, lock_timeout=lock_timeout)
@@ -1,22 +1,44 @@
 """Provides the Chain class keeping the information about intermediate devices (jumphosts) on the paths to target."""
 import re
 import logging
+from StringIO import StringIO
+
+import pexpect
 
 from condoor.device import Device
 from condoor.hopinfo import make_hop_info_from_url
 from condoor.controller import Controller
 from condoor.protocols import make_protocol
 from condoor.exceptions import ConnectionError, CommandSyntaxError, CommandError
+from condoor.sessionpool import session_pool
+from condoor.config import CONF
+from condoor.utils import probe_reachability
+
+# never matching pattern
+_NO_PROMPT_RE = re.compile("(?!x)x")
+
+_C = CONF['chain']['jumphost_pool']
+_RC = CONF['chain']['retry']
 
 
 def device_gen(chain, urls):
     """Device object generator."""
     itr = iter(urls)
     last = next(itr)
+    # only the first hop can be probed locally
+    verify = verify_reachability
     for url in itr:
-        yield Device(chain, make_hop_info_from_url(last), driver_name='jumphost', is_target=False)
+        yield Device(chain, make_hop_info_from_url(last, verify), driver_name='jumphost', is_target=False)
         last = url
-    yield Device(chain, make_hop_info_from_url(last), driver_name='generic', is_target=True)
+        verify = None
+    yield Device(chain, make_hop_info_from_url(last, verify), driver_name='generic', is_target=True)
+
+
+def verify_reachability(host, port):
+    """Return False if the TCP port is found closed. The result is cached for a few seconds."""
+    if not port:
+        return True
+    return probe_reachability([(host, port)], timeout=_RC['probe_timeout'], ttl=_RC['probe_ttl'])[(host, port)]
 
 
 class Chain(object):
@@ -25,11 +47,32 @@ class Chain(object):
     def __init__(self, connection, urls):
         """Initialize the new Chain object."""
         self.connection = connection
+        self._session_fd = None
         self.ctrl = Controller(connection)
         self.devices = [device for device in device_gen(self, urls)]
         self.target_device.driver_name = 'generic'
         self.target_device.is_target = True
 
+    @property
+    def session_fd(self):
+        """Return the session log fd of the chain. It is the connection session log unless buffered."""
+        return self.connection.session_fd if self._session_fd is None else self._session_fd
+
+    def buffer_session_log(self):
+        """Log the session to the chain own buffer, i.e. while racing the other chains of the connection."""
+        if self.connection.session_fd is not None:
+            self._session_fd = StringIO()
+            self.ctrl.set_logfile(self._session_fd)
+
+    def release_session_log(self):
+        """Write the buffered session log to the connection session log and log the session there again."""
+        if self._session_fd is not None:
+            buffered, self._session_fd = self._session_fd.getvalue(), None
+            session_fd = self.connection.session_fd
+            if buffered:
+                session_fd.write(buffered)
+            self.ctrl.set_logfile(session_fd)
+
     def __repr__(self):
         """Return the string representation of devices in the chain."""
         name = ""
@@ -41,13 +84,16 @@ class Chain(object):
         """Connect to the target device using the intermediate jumphosts."""
         device = None
         # logger.debug("Connecting to: {}".format(str(self)))
+        if not self.ctrl.connected:
+            self._checkout_jumphosts()
+
         for device in self.devices:
             if not device.connected:
                 self.connection.emit_message("Connecting {}".format(str(device)), log_level=logging.INFO)
                 protocol_name = device.get_protocol_name()
                 device.protocol = make_protocol(protocol_name, device)
                 command = device.protocol.get_command()
-                self.ctrl.spawn_session(command=command)
+                self.ctrl.spawn_session(command=command, session_factory=device.protocol.get_session)
                 try:
                     result = device.connect(self.ctrl)
                 except CommandSyntaxError as exc:
@@ -86,12 +132,116 @@ class Chain(object):
 
         return True
 
+    @property
+    def first_hop_address(self):
+        """Return the (host, port) of the first hop or None if the chain is already connected."""
+        if self.ctrl.connected:
+            return None
+        first = self.devices[0].node_info
+        return first.hostname, first.port
+
+    def probe(self):
+        """Return the first hop found not reachable or None.
+
+        The TCP port of the first hop is probed unless the chain is already connected. The last hop behind the
+        jumphosts can't be probed locally, so its verify_reachability callable is used if provided.
+        """
+        hops = [device.node_info for device in self.devices]
+        if not self.ctrl.connected and not hops[0].is_reachable():
+            return hops[0]
+        last = hops[-1]
+        if len(hops) > 1 and not last.is_reachable():
+            return last
+        return None
+
     def disconnect(self):
-        """Disconnect from the device."""
+        """Disconnect from the device.
+
+        The session connected to the jumphosts is returned to the jumphost session pool if enabled.
+        """
         self.target_device.disconnect()
-        self.ctrl.disconnect()
+        if not self._release_jumphosts():
+            self.ctrl.disconnect()
         self.tail_disconnect(-1)
 
+    @property
+    def jumphost_key(self):
+        """Return the key identifying the jumphost path or None if there are no jumphosts."""
+        jumphosts = self.devices[:-1]
+        if not jumphosts:
+            return None
+        return tuple((hop.protocol, hop.hostname, hop.port, hop.username, hop.password, hop.transport)
+                     for hop in (device.node_info for device in jumphosts))
+
+    def _checkout_jumphosts(self):
+        """Attach the idle session at the last jumphost prompt from the pool and mark the jumphosts connected."""
+        key = self.jumphost_key
+        if key is None or not _C['enabled']:
+            return False
+
+        while True:
+            pooled = session_pool.checkout(key, _C['idle_timeout'])
+            if pooled is None:
+                return False
+
+            self.connection.log("Jumphost session checked out from the pool")
+            self.ctrl.attach(pooled.session)
+            jumphosts = self.devices[:-1]
+            for device, (prompt, device_info) in zip(jumphosts, pooled.jumphosts):
+                device.device_info = device_info
+                device.prompt = prompt
+                device.prompt_re = device.driver.make_dynamic_prompt(prompt)
+                device.protocol = make_protocol(device.get_protocol_name(), device)
+                device.ctrl = self.ctrl
+                device.connected = True
+
+            if self._probe_last_jumphost():
+                self.connection.emit_message("Reusing the session to {}".format(jumphosts[-1]),
+                                             log_level=logging.INFO)
+                return True
+
+            self.connection.log("Pooled jumphost session not responding")
+            self.ctrl.disconnect()
+            self.tail_disconnect(-1)
+
+    def _release_jumphosts(self):
+        """Return the session at the last jumphost prompt to the pool. Return False if not possible."""
+        key = self.jumphost_key
+        if key is None or not _C['enabled']:
+            return False
+
+        jumphosts = self.devices[:-1]
+        if not all(device.connected for device in jumphosts) or not self.ctrl.connected:
+            return False
+
+        try:
+            if not self.ctrl.isalive():  # pylint: disable=no-member
+                return False
+            # leave the target device session if still open
+            for _ in range(_C['max_exit_attempts']):
+                if self._probe_last_jumphost():
+                    break
+                self.ctrl.sendline('exit')  # pylint: disable=no-member
+            else:
+                return False
+        except OSError:
+            return False
+
+        session_pool.checkin(key, self.ctrl.detach(),
+                             [(device.prompt, device.device_info) for device in jumphosts], _C['max_idle'])
+        self.connection.log("Jumphost session returned to the pool")
+        return True
+
+    def _probe_last_jumphost(self):
+        """Return True if the last jumphost prompt is received after sending the new line."""
+        prompt_re = self.devices[-2].prompt_re
+        try:
+            self.ctrl.sendline()  # pylint: disable=no-member
+            index = self.ctrl.expect([prompt_re, pexpect.TIMEOUT, pexpect.EOF], timeout=_C['probe_timeout'])
+        except OSError:
+            return False
+        return index == 0
+
     @property
     def target_device(self):
         """Return the target device object (last) in the chain."""
@@ -131,7 +281,7 @@ class Chain(object):
     def get_previous_prompts(self, device):
         """Return the list of intermediate prompts. All except target."""
         device_index = self.devices.index(device)
-        prompts = [re.compile("(?!x)x")] + \
+        prompts = [_NO_PROMPT_RE] + \
                   [dev.prompt_re for dev in self.devices[:device_index] if dev.prompt_re is not None]
         return prompts
 
@@ -154,9 +304,22 @@ class Chain(object):
         except IndexError:
             pass
 
-    def send(self, cmd, timeout, wait_for_string, password):
+    def send(self, cmd, timeout, wait_for_string, password, output_callback=None):
         """Send command to the target device."""
-        return self.target_device.send(cmd, timeout=timeout, wait_for_string=wait_for_string, password=password)
+        return self.target_device.send(cmd, timeout=timeout, wait_for_string=wait_for_string, password=password,
+                                       output_callback=output_callback)
+
+    def send_batch(self, cmds, timeout):
+        """Send the commands to the target device."""
+        return self.target_device.send_batch(cmds, timeout=timeout)
+
+    def send_start(self, cmd, timeout):
+        """Send the command to the target device without waiting for the output."""
+        self.target_device.send_start(cmd, timeout=timeout)
+
+    def send_step(self):
+        """Process the target device output received so far."""
+        return self.target_device.send_step()
 
     def update(self, data):
         """Update the chain object with the predefined data."""
@@ -3,21 +3,35 @@ import re
 import os
 import sys
 import time
-import shelve
 import logging
+import threading
+from Queue import Queue, Empty
 from hashlib import md5
 
 from collections import deque
+from condoor.cache import make_cache
 from condoor.chain import Chain
+from condoor.device import DISCOVERY_LEVELS
+from condoor.config import CONF
 from condoor.exceptions import ConnectionError, ConnectionTimeoutError
-from condoor.utils import FilteredFile, normalize_urls
+from condoor.utils import FilteredFile, normalize_urls, probe_reachability
 from condoor.log import FileLogger
+from condoor.logwriter import get_log_writer
+from condoor.retry import make_retry_policy
+from condoor.trace import FSMStats
 from condoor.version import __version__
 
 logger = logging.getLogger(__name__)
 
 
 _CACHE_FILE = "/tmp/condoor." + __version__
+_C = CONF['cache']
+_RC = CONF['chain']['race']
+_RTC = CONF['chain']['retry']
+_LC = CONF['log']
+
+# number of output chunks buffered by send_iter if not consumed
+_SEND_ITER_QUEUE_SIZE = 64
 
 
 class Connection(object):
@@ -34,6 +48,11 @@ class Connection(object):
         - enable
         - run_fsm
 
+    The separate Connection objects can be used concurrently by the threads in the same process. All the
+    connection state is kept in the object, the shared pattern_manager and CONF are read only and the cache
+    backend supports the concurrent access. The single Connection object must not be used by many threads
+    at the same time.
+
     """
 
     def __init__(self, name, urls=[], log_dir=None, log_level=logging.DEBUG, log_session=True):
@@ -70,12 +89,14 @@ class Connection(object):
             log_dir (str): The path to the directory when *session.log* and *condoor.log* is stored. If *None*
              the condoor log and session log is redirected to *stdout*
 
-            log_level (int): The condoor logging level.
+            log_level (int): The condoor logging level. The messages below the level are not formatted nor
+             written. The level 0 (NOTSET) disables the condoor log.
 
             log_session (Bool): If **True** the terminal session is logged.
 
 
         """
+        self._name = name
         self._discovered = False
         self._last_chain_index = 0
         self._msg_callback = None
@@ -92,10 +113,28 @@ class Connection(object):
         self._trace_fd = None
         self._external_trace_fd = True
 
+        self._log_level = log_level
         self.log = None
 
         self._urls = urls
         self.connection_chains = None
+        # the device information collected on connect
+        self.discovery_level = 'full'
+
+        self._cache = make_cache(_C['backend'], _C['path'] or _CACHE_FILE, ttl=_C['ttl'],
+                                 max_entries=_C['max_entries'], lock_timeout=_C['lock_timeout'])
+
+        # the delay between the failed connection attempts, can be replaced by the custom policy object
+        self.retry_policy = make_retry_policy(_RTC['policy'], initial_delay=_RTC['initial_delay'],
+                                              max_delay=_RTC['max_delay'], factor=_RTC['factor'],
+                                              jitter=_RTC['jitter'])
+        # probe the first hops of all chains concurrently and skip the unreachable chains
+        self.probe = _RTC['probe']
+
+        # the FSM response time histograms per FSM name and state
+        self.fsm_stats = FSMStats()
+        # the condoor.trace.TraceSink object receiving every FSM transition record, i.e. MemorySink
+        self.trace_sink = None
 
     def finalize(self):
         """Clean up the object.
@@ -114,9 +153,7 @@ class Connection(object):
         session_fd = None
         if self._log_dir is not None:
             try:
-                # FIXME: take pattern from pattern manager
-                session_fd = FilteredFile(os.path.join(self._log_dir, 'session.log'),
-                                          mode="a", pattern=re.compile("s?[f|s][t|c]p://.*:(.*)@"))
+                session_fd = self._open_log_file('session.log', index=_LC['index'])
             except IOError:
                 print("Unable to create session log file")
 
@@ -126,12 +163,33 @@ class Connection(object):
 
         return session_fd
 
+    def _open_log_file(self, filename, index=False):
+        """Return the file object for the log file in the log directory.
+
+        With the queue log backend the file is written by the process wide writer thread and named after the
+        connection if per_device_files is set, i.e. session-<name>.log.
+        """
+        kwargs = dict(mode="a", pattern=self._redact_patterns(), flush_size=_LC['flush_size'],
+                      flush_interval=_LC['flush_interval'], rotate=_LC['rotate'], index=index)
+        if _LC['backend'] != 'queue':
+            return FilteredFile(os.path.join(self._log_dir, filename), **kwargs)
+
+        if _LC['queue']['per_device_files']:
+            base, ext = os.path.splitext(filename)
+            filename = "{}-{}{}".format(base, re.sub(r"[^\w.-]", "_", self._name), ext)
+        writer = get_log_writer(max_size=_LC['queue']['max_size'], flush_interval=_LC['flush_interval'])
+        return writer.open(os.path.join(self._log_dir, filename), **kwargs)
+
+    @staticmethod
+    def _redact_patterns():
+        from condoor import pattern_manager  # pylint: disable=cyclic-import
+        return [pattern_manager.pattern('generic', 'privacy_filter', compiled=False)] + _LC['redact']
+
     def _make_trace_fd(self):
         trace_fd = None
         if self._log_dir is not None:
             try:
-                trace_fd = FilteredFile(os.path.join(self._log_dir, 'condoor.log'), mode="a",
-                                        pattern=re.compile("s?[f|s][t|c]p://.*:(.*)@"))
+                trace_fd = self._open_log_file('condoor.log')
             except IOError:
                 print("Unable to create log file")
         else:
@@ -158,11 +216,13 @@ class Connection(object):
                 self._trace_fd = self._make_trace_fd()
                 self._external_trace_fd = False
 
-        self.log = FileLogger(self._trace_fd)
+        self.log = FileLogger(self._trace_fd, level=self._log_level, buffer_size=_LC['buffer_size'],
+                              flush_interval=_LC['flush_interval'])
 
     def _disable_logging(self):
         if self._trace_fd:
             self.log("Closing logs")
+            self.log.flush()
         if not self._external_trace_fd and self._trace_fd:
             if not self._trace_fd.closed:
                 self._trace_fd.flush()
@@ -187,33 +247,26 @@ class Connection(object):
         self.log("Cache key: {}".format(self.connection_chains))
         return key.hexdigest()
 
-    def _cache_open(self, mode='r'):
-        try:
-            cache = shelve.open(_CACHE_FILE, mode)
-        except Exception:
-            self.log("Unable to open a cache file for read.")
-            return None
-        return cache
-
     def _write_cache(self):
         key = self._get_key()
-        cache = self._cache_open(mode='c')
-        if cache is not None:
-            cache[key] = self.description_record
-            cache.close()
-            self.log("Connection information cached: {}".format(key))
+        try:
+            self._cache.set(key, self.description_record)
+        except Exception as err:  # pylint: disable=broad-except
+            self.log("Unable to write the cache: {}".format(err))
+            return
+        self.log("Connection information cached: {}".format(key))
 
     def _read_cache(self):
         key = self._get_key()
-        cache = self._cache_open(mode='r')
-        if cache is not None:
-            try:
-                self.description_record = cache[key]
-                self.log("Read cached information.")
-            except KeyError:
-                self.log("Connection cache missed: {}.".format(key))
-            finally:
-                cache.close()
+        try:
+            description_record = self._cache.get(key)
+        except KeyError:
+            self.log("Connection cache missed: {}.".format(key))
+        except Exception as err:  # pylint: disable=broad-except
+            self.log("Unable to read the cache: {}".format(err))
+        else:
+            self.description_record = description_record
+            self.log("Read cached information.")
 
     def _clear_cache(self):
         # key = self._get_key()
@@ -229,7 +282,7 @@ class Connection(object):
         chain_indices.rotate(self._last_chain_index)
         return chain_indices
 
-    def connect(self, logfile=None, force_discovery=False, tracefile=None):
+    def connect(self, logfile=None, force_discovery=False, tracefile=None, discovery='full', race=None):
         """Connect to the device.
 
         Args:
@@ -239,6 +292,19 @@ class Connection(object):
 
             force_discovery (Bool): Optional. If True the device discover process will start after getting connected.
 
+            discovery (str): Optional. The device information collected after getting connected:
+
+                - 'minimal': only the prompt is detected and the terminal session prepared. No show commands sent.
+                - 'standard': additionally the OS type, OS version and hardware family from the version information.
+                - 'full': additionally the inventory, platform and console connection. This is the default.
+
+                The information not collected on connect is collected when the related property is read,
+                i.e. :attr:`platform`.
+
+            race (bool): Optional. If True all the connection chains are connected concurrently and the first
+                connected is used, i.e. for the dual RSP console connection. If None the ``chain.race.enabled``
+                configuration value is used.
+
         Raises:
             ConnectionError: If the discovery method was not called first or there was a problem with getting
                 the connection.
@@ -249,11 +315,12 @@ class Connection(object):
 
         """
         self.reconnect(logfile=logfile, max_timeout=120, force_discovery=force_discovery, tracefile=tracefile,
-                       retry=False)
+                       retry=False, discovery=discovery, race=race)
 
         return
 
-    def reconnect(self, logfile=None, max_timeout=360, force_discovery=False, tracefile=None, retry=True):
+    def reconnect(self, logfile=None, max_timeout=360, force_discovery=False, tracefile=None, retry=True,
+                  discovery='full', race=None):
         """Reconnect to the device.
 
         It can be called when after device reloads or the session was
@@ -275,6 +342,12 @@ class Connection(object):
 
             retry (bool): Optional parameter causing the connnection to retry until timeout
 
+            discovery (str): Optional. The device information collected after getting connected: 'minimal',
+                'standard' or 'full'. Refer to :meth:`connect`.
+
+            race (bool): Optional. If True all the connection chains are connected concurrently and the first
+                connected is used. The others are aborted. If None the ``chain.race.enabled`` configuration
+                value is used.
 
         Raises:
             ConnectionError: If the discovery method was not called first or there was a problem with getting
@@ -285,40 +358,63 @@ class Connection(object):
             ConnectionTimeoutError: If the connection timeout happened.
 
         """
+        if discovery not in DISCOVERY_LEVELS:
+            raise ValueError("Unknown discovery level: {}".format(discovery))
+        self.discovery_level = discovery
+
         self._enable_logging(logfile, tracefile)
 
         self.log("-" * 20)
         self.log("Condoor Version {}".format(__version__))
-        self.log("Cache filename: {}".format(_CACHE_FILE))
+        self.log("Cache filename: {}".format(self._cache.filename))
 
         self.connection_chains = [Chain(self, url_list) for url_list in normalize_urls(self._urls)]
         self.log("Connecting")
 
         self._clear_cache() if force_discovery else self._read_cache()
 
-        excpt = ConnectionError("Could not (re)connect to the device")
         chains = len(self.connection_chains)
-
-        chain_indices = self._chain_indices()
         for index, chain in enumerate(self.connection_chains, start=1):
             self.emit_message("Connection chain {}/{}: {}".format(index, chains, str(chain)), log_level=logging.INFO)
 
+        if race is None:
+            race = _RC['enabled']
+
         self.emit_message("Trying to (re)connect within {} seconds".format(max_timeout), log_level=logging.INFO)
+        if race and chains > 1:
+            elapsed = self._race_chains(max_timeout, retry)
+        else:
+            elapsed = self._try_chains(max_timeout, retry)
+
+        self._write_cache()
+        self.emit_message("Target device connected in {:.0f}s.".format(elapsed), log_level=logging.INFO)
+        self.log("-" * 20)
+
+    def _try_chains(self, max_timeout, retry):
+        """Try the connection chains in turn starting with the last successful. Return the elapsed time."""
+        excpt = ConnectionError("Could not (re)connect to the device")
+        chain_indices = self._chain_indices()
         sleep_time = 0
         begin = time.time()
         attempt = 1
+        failures = 0
         elapsed = 0
 
         while max_timeout - elapsed > 0:
             # there is no reason to wait for another chain.
             if (attempt - 1) % len(self.connection_chains) != 0:
-                sleep_time = 2
+                sleep_time = min(sleep_time, 2)
 
             if sleep_time > 0:
-                self.emit_message("Waiting {:.0f}s before next connection attempt".format(sleep_time), log_level=logging.INFO)
+                self.emit_message("Waiting {:.1f}s before next connection attempt".format(sleep_time),
+                                  log_level=logging.INFO)
                 time.sleep(sleep_time)
 
+            if self.probe and (attempt - 1) % len(self.connection_chains) == 0:
+                self._probe_chains()
+
             elapsed = time.time() - begin
+            reachable = True
             try:
                 index = chain_indices[0]
                 self.emit_message("Connection chain/attempt [{}/{}]".format(index + 1, attempt),
@@ -326,6 +422,10 @@ class Connection(object):
 
                 chain = self.connection_chains[index]
                 self._last_chain_index = index
+                hop = chain.probe() if self.probe else None
+                if hop is not None:
+                    reachable = False
+                    raise ConnectionError("Host not reachable on port {}".format(hop.port), hop.hostname)
                 if chain.connect():
                     break
             except (ConnectionTimeoutError, ConnectionError) as e:  # pylint: disable=invalid-name
@@ -342,11 +442,20 @@ class Connection(object):
                 excpt = e
 
             finally:
-                # TODO: Make a configuration parameter
                 elapsed = time.time() - begin
-                sleep_time = min(30, max_timeout - elapsed)
                 self.emit_message("Time elapsed {:.0f}s/{:.0f}s".format(elapsed, max_timeout), log_level=logging.INFO)
 
+            if reachable:
+                failures += 1
+                sleep_time = min(self.retry_policy.delay(failures), max_timeout - elapsed)
+                self.emit_message("Retry: {} failed attempt(s), backing off {:.1f}s".format(failures, sleep_time),
+                                  log_level=logging.INFO)
+            else:
+                # probing is cheap, so poll often to connect as soon as the port opens, i.e. after reload
+                sleep_time = min(_RTC['probe_interval'], max_timeout - elapsed)
+                self.emit_message("Retry: host not reachable, probing again in {:.1f}s".format(sleep_time),
+                                  log_level=logging.INFO)
+
             attempt += 1
             if attempt > len(self.connection_chains) and not retry:
                 self.emit_message("Unable to (re)connect within {:.0f}s".format(elapsed), log_level=logging.ERROR)
@@ -359,9 +468,122 @@ class Connection(object):
             self._disable_logging()
             raise excpt
 
-        self._write_cache()
-        self.emit_message("Target device connected in {:.0f}s.".format(elapsed), log_level=logging.INFO)
-        self.log("-" * 20)
+        return elapsed
+
+    def _race_chains(self, max_timeout, retry):
+        """Connect all the chains concurrently and keep the first connected. Return the elapsed time."""
+        excpt = ConnectionError("Could not (re)connect to the device")
+        begin = time.time()
+        attempt = 1
+        elapsed = 0
+
+        while max_timeout - elapsed > 0:
+            self.emit_message("Racing the connection chains [attempt {}]".format(attempt), log_level=logging.INFO)
+            index, error = self._race(max_timeout - elapsed)
+            elapsed = time.time() - begin
+            self.emit_message("Time elapsed {:.0f}s/{:.0f}s".format(elapsed, max_timeout), log_level=logging.INFO)
+            if index is not None:
+                self._last_chain_index = index
+                self.emit_message("Connection chain {} won the race".format(index + 1), log_level=logging.INFO)
+                return elapsed
+
+            excpt = error or excpt
+            if not retry:
+                break
+
+            sleep_time = min(self.retry_policy.delay(attempt), max_timeout - elapsed)
+            if sleep_time > 0:
+                self.emit_message("Waiting {:.1f}s before next connection attempt".format(sleep_time),
+                                  log_level=logging.INFO)
+                time.sleep(sleep_time)
+            elapsed = time.time() - begin
+            attempt += 1
+
+        self.emit_message("Unable to (re)connect within {:.0f}s".format(elapsed), log_level=logging.ERROR)
+        self._clear_cache()
+        self._disable_logging()
+        raise excpt
+
+    def _probe_chains(self):
+        """Probe the first hops of all the chains concurrently. The chains use the cached results."""
+        addresses = [chain.first_hop_address for chain in self.connection_chains]
+        results = probe_reachability([address for address in addresses if address and address[1]],
+                                     timeout=_RTC['probe_timeout'], ttl=_RTC['probe_ttl'])
+        for (host, port), reachable in sorted(results.items()):
+            if not reachable:
+                self.emit_message("Host {}:{} not reachable".format(host, port), log_level=logging.INFO)
+
+    def _race(self, timeout):
+        """Run one race of the connection chains.
+
+        Return the index of the first connected chain or None and the last connection error. The chains which
+        lost the race are aborted and disconnect themselves. Each chain logs the session to its own buffer and
+        only the buffer of the winner is written to the session log.
+        """
+        results = Queue()
+        lock = threading.Lock()
+        winner = [None]
+
+        def connect(index, chain):
+            error = None
+            try:
+                hop = chain.probe() if self.probe else None
+                if hop is not None:
+                    raise ConnectionError("Host not reachable on port {}".format(hop.port), hop.hostname)
+                connected = chain.connect()
+            except Exception as exc:  # pylint: disable=broad-except
+                connected, error = False, exc
+            with lock:
+                won = connected and winner[0] is None
+                if won:
+                    winner[0] = index
+            if not won:
+                try:
+                    chain.disconnect()
+                except Exception as exc:  # pylint: disable=broad-except
+                    self.log("Connection chain {} disconnect error: {}".format(index + 1, exc))
+            results.put((index, won, error))
+
+        if self.probe:
+            self._probe_chains()
+
+        threads = []
+        for index, chain in enumerate(self.connection_chains):
+            chain.buffer_session_log()
+            thread = threading.Thread(target=connect, args=(index, chain), name="condoor-chain-{}".format(index + 1))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        excpt = None
+        end_time = time.time() + timeout
+        for _ in threads:
+            try:
+                index, won, error = results.get(timeout=max(0, end_time - time.time()))
+            except Empty:
+                break
+            if won:
+                break
+            if error is not None:
+                self.emit_message("Connection chain {} error: {}".format(index + 1, error), log_level=logging.INFO)
+                excpt = error
+
+        with lock:
+            if winner[0] is None:
+                # the chains connected after the timeout disconnect themselves
+                winner[0] = -1
+            index = winner[0]
+
+        for chain_index, thread in enumerate(threads):
+            if chain_index != index and thread.is_alive():
+                self.connection_chains[chain_index].ctrl.abort()
+        for chain_index, thread in enumerate(threads):
+            if chain_index != index:
+                thread.join(_RC['abort_timeout'])
+        if index >= 0:
+            self.connection_chains[index].release_session_log()
+
+        return (index if index >= 0 else None), excpt
 
     def pause_session_logging(self):
         """Pause session logging."""
@@ -373,7 +595,7 @@ class Connection(object):
         self._chain.ctrl.set_session_log(self.session_fd)
         self.log("Session logging resumed")
 
-    def send(self, cmd="", timeout=300, wait_for_string=None, password=False):
+    def send(self, cmd="", timeout=300, wait_for_string=None, password=False, output_file=None):
         """Send the command to the device and return the output.
 
         Args:
@@ -384,9 +606,15 @@ class Connection(object):
             prompt will be used.
             password (bool): If true cmd representing password is not logged
                 and condoor waits for noecho.
+            output_file (file): Optional file object open for write. If provided
+                the output is written to the file as it arrives and only the
+                search window is kept in memory. Useful for the long outputs,
+                i.e. show tech-support.
 
         Returns:
-            A string containing the command output.
+            A string containing the command output. If output_file provided,
+            the dictionary with the number of bytes written and the command
+            duration in seconds: {'bytes': 1024, 'duration': 1.5}
 
         Raises:
             ConnectionError: General connection error during command execution
@@ -394,7 +622,151 @@ class Connection(object):
             CommandTimeoutError: Timeout during command execution
 
         """
-        return self._chain.send(cmd, timeout, wait_for_string, password)
+        if output_file is None:
+            return self._chain.send(cmd, timeout, wait_for_string, password)
+
+        written = [0]
+
+        def write(data):
+            output_file.write(data)
+            written[0] += len(data)
+
+        begin = time.time()
+        self._chain.send(cmd, timeout, wait_for_string, password, output_callback=write)
+        duration = time.time() - begin
+        self.log("Command output written: {} bytes in {:.1f}s".format(written[0], duration))
+        return {'bytes': written[0], 'duration': duration}
+
+    def send_batch(self, cmds, timeout=300):
+        """Send the commands to the device back to back and return the outputs.
+
+        The commands are written ahead without waiting for the previous command to complete. This saves the
+        round trip per command on the high latency paths. The number of characters written ahead is limited
+        by the driver batch_window to not overflow the device input buffer.
+
+        Args:
+            cmds (list): List of command strings.
+            timeout (int): Timeout in seconds for each command. Defaults to 300 sec (5 min)
+
+        Returns:
+            A list with the output string for each command or the CommandSyntaxError instance if the command
+            was rejected by the device. The CommandSyntaxError command attribute contains the rejected command.
+
+        Raises:
+            ConnectionError: General connection error during command execution
+            CommandTimeoutError: Timeout during command execution
+
+        """
+        return self._chain.send_batch(cmds, timeout)
+
+    def send_start(self, cmd, timeout=300):
+        """Send the command to the device and return without waiting for the output.
+
+        This and :meth:`send_step` allow to drive many connections from one thread using ``select``::
+
+            for conn in connections:
+                conn.send_start("show version")
+            outputs = {}
+            while len(outputs) < len(connections):
+                waiting = [conn for conn in connections if conn not in outputs]
+                readable, _, _ = select.select(waiting, [], [], 1)
+                for conn in readable or waiting:
+                    output = conn.send_step()
+                    if output is not None:
+                        outputs[conn] = output
+
+        Args:
+            cmd (str): Command string for execution.
+            timeout (int): Timeout in seconds. Defaults to 300 sec (5 min)
+
+        Raises:
+            ConnectionError: General connection error during command execution
+            CommandError: The previous command not completed.
+
+        """
+        self._chain.send_start(cmd, timeout)
+
+    def send_step(self):
+        """Process the command output received so far and return the output or None if not completed yet.
+
+        It never waits for the device, so it is called when the connection is readable, i.e. returned by
+        ``select``, and periodically to detect the timeout. The output is the same as returned by :meth:`send`.
+
+        Returns:
+            A string containing the command output or None if the prompt not received yet.
+
+        Raises:
+            ConnectionError: General connection error during command execution
+            CommandSyntaxError: Command syntax error or unknown command.
+            CommandTimeoutError: Timeout passed since :meth:`send_start`
+            CommandError: No command started.
+
+        """
+        return self._chain.send_step()
+
+    def fileno(self):
+        """Return the file descriptor of the target device session, i.e. to wait for the output with select."""
+        return self._chain.ctrl.fileno()  # pylint: disable=no-member
+
+    def send_iter(self, cmd="", timeout=300, wait_for_string=None):
+        """Send the command to the device and yield the output chunks as they arrive.
+
+        The output is not collected in memory, so the long outputs can be processed while the command is
+        still running. The output of the command the driver extracts from the other session, i.e. the eXR admin
+        command executed in Calvados, is collected and yielded once the command completes. The paging,
+        unexpected prompts and syntax errors are handled the same way as for `send`.
+        The session is used by the background thread until the command finishes, so if the iteration is
+        stopped early the remaining output is read and discarded.
+
+        Args:
+            cmd (str): Command string for execution. Defaults to empty string.
+            timeout (int): Timeout in seconds. Defaults to 300 sec (5 min)
+            wait_for_string (str): This is optional string that driver
+            waits for after command execution. If none the detected
+            prompt will be used.
+
+        Yields:
+            The command output strings.
+
+        Raises:
+            ConnectionError: General connection error during command execution
+            CommandSyntaxError: Command syntax error or unknown command.
+            CommandTimeoutError: Timeout during command execution
+
+        """
+        chunks = Queue(_SEND_ITER_QUEUE_SIZE)
+        finished = object()
+        error = []
+
+        def execute():
+            try:
+                self._chain.send(cmd, timeout, wait_for_string, False, output_callback=chunks.put)
+            except Exception as exc:  # pylint: disable=broad-except
+                error.append(exc)
+            finally:
+                chunks.put(finished)
+
+        thread = threading.Thread(target=execute, name="condoor-send-iter")
+        thread.daemon = True
+        thread.start()
+
+        chunk = None
+        try:
+            while chunk is not finished:
+                try:
+                    # the timeout keeps the main thread responsive to KeyboardInterrupt
+                    chunk = chunks.get(timeout=1)
+                except Empty:
+                    continue
+                if chunk is not finished:
+                    yield chunk
+        finally:
+            while chunk is not finished:
+                chunk = chunks.get()
+            thread.join()
+
+        if error:
+            raise error[0]
 
     def config(self, configlet=None, plane='sdr', **attributes):
         """Configure the device.
@@ -573,7 +945,7 @@ class Connection(object):
 
     def emit_message(self, message, log_level):
         """Call the msg callback function with the message."""
-        self.log(message)
+        self.log.log(log_level, message)
         if log_level == logging.ERROR:
             if self._error_msg_callback:
                 self._error_msg_callback(message)
@@ -664,7 +1036,7 @@ class Connection(object):
     @property
     def is_console(self):
         """Return if target device is connected via console."""
-        return self._chain.is_console
+        return self._chain.target_device.discover('is_console')
 
     @property
     def prompt(self):
@@ -682,7 +1054,7 @@ class Connection(object):
 
         For example: IOS, XR, eXR. If not detected returns *None*
         """
-        return self._chain.target_device.os_type
+        return self._chain.target_device.discover('os_type')
 
     @property
     def os_version(self):
@@ -690,7 +1062,7 @@ class Connection(object):
 
         For example 5.3.1. If not detected returns *None*
         """
-        return self._chain.target_device.os_version
+        return self._chain.target_device.discover('os_version')
 
     @property
     def family(self):
@@ -698,7 +1070,7 @@ class Connection(object):
 
         For example: ASR9K, ASR900, NCS6K, etc.
         """
-        return self._chain.target_device.family
+        return self._chain.target_device.discover('family')
 
     @property
     def platform(self):
@@ -706,7 +1078,7 @@ class Connection(object):
 
         For example: ASR-9010, ASR922, NCS-4006, etc.
         """
-        return self._chain.target_device.platform
+        return self._chain.target_device.discover('platform')
 
     @property
     def mode(self):
@@ -719,27 +1091,27 @@ class Connection(object):
     @property
     def name(self):
         """Return the chassis name."""
-        return self._chain.target_device.udi['name']
+        return self.udi['name']
 
     @property
     def description(self):
         """Return the chassis description."""
-        return self._chain.target_device.udi['description']
+        return self.udi['description']
 
     @property
     def pid(self):
         """Return the chassis PID."""
-        return self._chain.target_device.udi['pid']
+        return self.udi['pid']
 
     @property
     def vid(self):
         """Return the chassis VID."""
-        return self._chain.target_device.udi['vid']
+        return self.udi['vid']
 
     @property
     def sn(self):  # pylint: disable=invalid-name
         """Return the chassis SN."""
-        return self._chain.target_device.udi['sn']
+        return self.udi['sn']
 
     @property
     def udi(self):
@@ -756,7 +1128,7 @@ class Connection(object):
             }
 
         """
-        return self._chain.target_device.udi
+        return self._chain.target_device.discover('udi')
 
     @property
     def device_info(self):
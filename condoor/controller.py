@@ -2,17 +2,61 @@
 
 import re
 import os
+import sys
+import signal
 import pexpect
 from time import time
 
 from condoor.utils import delegate, levenshtein_distance
 from condoor.exceptions import ConnectionError, ConnectionTimeoutError
+from condoor.searcher import Searcher
+from condoor.transport import SocketSession
+
+# the expect result for the output passed to the output callback, above any event index
+_CHUNK_INDEX = sys.maxint
+
+
+class _StreamingSearcher(object):
+    """The searcher wrapper reporting the output which can't be matched anymore as the chunk event.
+
+    pexpect passes only the last searchwindowsize characters to the searcher. If no pattern matches there and
+    more data was received since the last match, the empty match at the window start is reported with the
+    chunk_index. pexpect then returns everything before the window as ``before`` and keeps the window, so
+    the older output is passed to the callback and dropped. This keeps the memory bounded for the long outputs.
+    """
+
+    def __init__(self, searcher, chunk_index):
+        """Initialize the _StreamingSearcher object."""
+        self._searcher = searcher
+        self.chunk_index = chunk_index
+        self.start = None
+        self.end = None
+        self.match = None
+        # the number of characters received by the expect call
+        self._received = 0
+
+    def __getattr__(self, name):
+        """Delegate the searcher attributes, i.e. eof_index, timeout_index."""
+        return getattr(self._searcher, name)
+
+    def search(self, buffer, freshlen, searchwindowsize=None):
+        """Search the buffer or report the chunk event if there is data before the search window."""
+        self._received += freshlen
+        index = self._searcher.search(buffer, freshlen, searchwindowsize)
+        if index >= 0:
+            self.start, self.end, self.match = self._searcher.start, self._searcher.end, self._searcher.match
+            return index
+        if buffer and self._received > len(buffer):
+            self.start = self.end = 0
+            self.match = None
+            return self.chunk_index
+        return -1
 
 
 # Delegate following methods to _session class
-@delegate("_session", ("expect", "expect_exact", "expect_list", "compile_pattern_list", "sendline",
+@delegate("_session", ("expect_exact", "expect_list", "compile_pattern_list", "sendline",
                        "isalive", "sendcontrol", "send", "read_nonblocking", "setecho", "delaybeforesend",
-                       "waitnoecho"))
+                       "waitnoecho", "fileno"))
 class Controller(object):
     """Controller class which wraps the pyexpect.spawn class."""
 
@@ -26,14 +70,20 @@ class Controller(object):
         self.connected = False
         self.authenticated = False
         self.last_hop = 0
+        # if set the output received by the FSM is passed to this callable instead of collected in before
+        self.output_callback = None
 
     @property
     def hostname(self):
         """Return the hostname."""
         return self._connection.hostname
 
-    def spawn_session(self, command):
-        """Spawn the session using proper command."""
+    def spawn_session(self, command, session_factory=None):
+        """Spawn the session using proper command.
+
+        If there is no session yet and the session_factory callable returns the in-process session object
+        it is used instead of spawning the command.
+        """
         if self._session and self.isalive():  # pylint: disable=no-member
             self._connection.log("Executing command: '{}'".format(command))
             try:
@@ -47,9 +97,20 @@ class Controller(object):
                 raise ConnectionTimeoutError("Timeout", self.hostname)
 
         else:
+            session = session_factory() if session_factory else None
+            if session is not None:
+                self._connection.log("Opening in-process session: {}".format(session.__class__.__name__))
+                self._session = session
+                self._session.delaybeforesend = 0.3
+                self._connection.log("Terminal window size: {}x{}".format(*self._session.getwinsize()))
+                self.set_session_log(self._logfile_fd)
+                self.connected = True
+                return
+
             self._connection.log("Spawning command: '{}'".format(command))
-            env = os.environ
-            env['TERM'] = 'vt220'  # to avoid color control characters and make sure other env not intact, esp. PATH
+            # to avoid color control characters and make sure other env not intact, esp. PATH
+            # the copy keeps the process environment untouched for the other threads
+            env = dict(os.environ, TERM='vt220')
             try:
                 self._session = pexpect.spawn(
                     command,
@@ -77,12 +138,73 @@ class Controller(object):
             self.set_session_log(self._logfile_fd)
             self.connected = True
 
+    def attach(self, session):
+        """Attach the already connected session, i.e. checked out from the jumphost session pool."""
+        self._connection.log("Attaching the session: {}".format(session.__class__.__name__))
+        self._session = session
+        self.set_session_log(self._logfile_fd)
+        self.connected = True
+
+    def detach(self):
+        """Detach and return the session without closing it. The controller is left disconnected."""
+        session, self._session = self._session, None
+        if session is not None:
+            self._connection.log("Detaching the session")
+            if session.logfile_read:
+                session.logfile_read.write("\r\n")
+            session.logfile_read = None
+        self.connected = False
+        return session
+
+    def set_logfile(self, logfile_fd):
+        """Set the session log fd of the current session and the sessions spawned or attached later."""
+        self._logfile_fd = logfile_fd
+        self.set_session_log(logfile_fd)
+
     def set_session_log(self, session_log_fd=None):
         """Set the fd for session log."""
         self._connection.log("Setting the session log")
         if self._session:
             self._session.logfile_read = session_log_fd
 
+    def expect(self, pattern, timeout=-1, searchwindowsize=-1):
+        """Wait for the pattern.
+
+        The pattern can be also the precompiled :class:`condoor.searcher.Searcher` object which is passed
+        directly to the pexpect loop without compiling the pattern list again. In this case if the output_callback
+        is set, the received output is passed to it as it arrives, except the matched patterns.
+        """
+        if isinstance(pattern, Searcher):
+            if self.output_callback is None:
+                return self._session.expect_loop(pattern, timeout=timeout, searchwindowsize=searchwindowsize)
+
+            if searchwindowsize == -1:
+                searchwindowsize = self._session.searchwindowsize
+            if timeout == -1:
+                timeout = self._session.timeout
+            end_time = None if timeout is None else time() + timeout
+            while True:
+                # pexpect passes the data kept from the previous call as fresh, so it is counted from zero again
+                searcher = _StreamingSearcher(pattern, _CHUNK_INDEX)
+                index = self._session.expect_loop(searcher, timeout=timeout, searchwindowsize=searchwindowsize)
+                if index != _CHUNK_INDEX:
+                    break
+                self.output_callback(self._session.before)
+                if end_time is not None:
+                    timeout = max(0, end_time - time())
+            if index not in (pattern.timeout_index, pattern.eof_index) and self._session.before:
+                self.output_callback(self._session.before)
+            return index
+        return self._session.expect(pattern, timeout=timeout, searchwindowsize=searchwindowsize)
+
+    def send_lines(self, lines):
+        """Send the lines at once without waiting for the echo."""
+        try:
+            self._session.send("".join(line + self._session.linesep for line in lines))
+        except OSError:
+            self._connection.log("Session already disconnected.")
+            raise ConnectionError("Session already disconnected")
+
     def send_command(self, cmd, password=False):
         """Send command."""
         try:
@@ -114,6 +236,24 @@ class Controller(object):
         self._connection.log("Disconnected")
         self.connected = False
 
+    def abort(self):
+        """Abort the session used by the other thread, i.e. the racing connection chain.
+
+        The session is not closed here. The child process is killed or the connection shut down, so the thread
+        waiting for the output gets EOF and disconnects the session itself.
+        """
+        session = self._session
+        if session is None:
+            return
+        self._connection.log("Aborting the session")
+        if isinstance(session, SocketSession):
+            session.terminate(force=True)
+        else:
+            try:
+                os.kill(session.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
     def try_read_prompt(self, timeout_multiplier):
         """Read the prompt.
 
@@ -150,6 +290,35 @@ class Controller(object):
         prompt = prompt.strip()
         return prompt
 
+    def validate_prompt(self, prompt, timeout=2):
+        """Validate the known prompt.
+
+        Discard the pending output, press enter once and check if the response ends with the prompt.
+        This is used instead of detect_prompt when the prompt is known from the cache.
+        Return True if the prompt received within the timeout.
+        """
+        try:
+            while True:
+                self.read_nonblocking(size=65536, timeout=0)  # pylint: disable=no-member
+        except pexpect.TIMEOUT:
+            pass
+        except pexpect.EOF:
+            raise ConnectionError('Session disconnected')
+        self._session.buffer = self._session.string_type()
+
+        # anchored to the end of received data, so the prompt must be the last thing the device sent
+        prompt_re = re.compile("(\r\n|\n\r|\r|\n)" + re.escape(prompt) + r"\s*$")
+        self.sendline()  # pylint: disable=no-member
+        try:
+            self.expect([prompt_re], timeout=timeout)
+        except pexpect.TIMEOUT:
+            self._connection.log("Prompt '{}' not received within {}s".format(prompt, timeout))
+            return False
+        except pexpect.EOF:
+            raise ConnectionError('Session disconnected')
+        self._connection.log("Prompt '{}' validated".format(prompt))
+        return True
+
     def detect_prompt(self, sync_multiplier=4):
         """Detect the prompt.
 
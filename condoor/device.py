@@ -1,16 +1,31 @@
 """Provides Device class representing the physical device for both target and jumphost."""
 
 import sys
+import time
+from collections import deque
 import pexpect
 
-from condoor.exceptions import ConnectionError, CommandSyntaxError, CommandTimeoutError
+from condoor.exceptions import ConnectionError, CommandError, CommandSyntaxError, CommandTimeoutError
 from condoor.utils import parse_inventory
 from condoor.fsm import FSM
 
+# the device information collected on connect: prompt only, plus version information, plus inventory and users
+DISCOVERY_LEVELS = ('minimal', 'standard', 'full')
+
 
 class Device(object):
     """Device class representing physical device for both target and jumphost."""
 
+    # the methods collecting the attributes not discovered on connect
+    _updaters = {
+        'os_type': 'update_os_type',
+        'os_version': 'update_os_version',
+        'family': 'update_family',
+        'udi': 'update_udi',
+        'platform': 'update_platform',
+        'is_console': 'update_console',
+    }
+
     def __init__(self, chain, node_info, driver_name='jumphost', is_target=False):
         """Initialize Device object."""
         self.chain = chain
@@ -27,6 +42,8 @@ class Device(object):
 
         # prompt
         self.prompt = None
+        # the prompt received right after the authentication, cached to skip the prompt detection
+        self.login_prompt = None
         self.prompt_re = None
 
         # properties with getter to collect in case None
@@ -61,6 +78,9 @@ class Device(object):
 
         self.last_error_msg = None
 
+        # the command sent by send_start and not yet completed by send_step
+        self._started = None
+
     @property
     def device_info(self):
         """Return device info dict."""
@@ -76,6 +96,7 @@ class Device(object):
             'is_console': self.is_console,
             'is_target': self.is_target,
             # 'prompt': self.driver.base_prompt(self.prompt),
+            'login_prompt': self.login_prompt,
             'hostname': self.hostname,
         }
 
@@ -101,6 +122,7 @@ class Device(object):
         self.udi = None
         # self.is_console = None
         self.prompt = None
+        self.login_prompt = None
         self.prompt_re = None
 
     def connect(self, ctrl):
@@ -113,9 +135,18 @@ class Device(object):
         self.ctrl = ctrl
         if self.protocol.connect(self.driver):
             if self.protocol.authenticate(self.driver):
-                self.ctrl.try_read_prompt(1)
-                if not self.prompt:
+                prompts = [self.login_prompt] if self.login_prompt else []
+                if self.prompt and self.prompt != self.login_prompt:
+                    # the last prompt of the previous session, i.e. not stored as the login prompt
+                    prompts.append(self.prompt)
+                for prompt in prompts:
+                    if self.ctrl.validate_prompt(prompt, self.driver.prompt_validation_timeout):
+                        self.prompt = self.login_prompt = prompt
+                        break
+                else:
+                    self.ctrl.try_read_prompt(1)
                     self.prompt = self.ctrl.detect_prompt()
+                    self.login_prompt = self.prompt
 
                 if self.is_target:
                     self.update_config_mode()
@@ -128,7 +159,7 @@ class Device(object):
                 self.connected = True
 
                 if self.is_target is False:
-                    if self.os_version is None:
+                    if self.os_version is None and self.chain.connection.discovery_level != 'minimal':
                         self.update_os_version()
 
                     self.update_hostname()
@@ -141,7 +172,8 @@ class Device(object):
             return False
 
     def _connected_to_target(self):
-        self.chain.connection.log('_connected_to_target')
+        discovery_level = self.chain.connection.discovery_level
+        self.chain.connection.log('_connected_to_target (discovery: {})'.format(discovery_level))
         self.update_driver(self.prompt)
         self.after_connect()
 
@@ -150,12 +182,13 @@ class Device(object):
         except CommandSyntaxError:
             pass
 
-        if self.os_type is None:
+        if self.os_type is None and discovery_level != 'minimal':
             self.update_os_type()
 
+        # the driver detected from the prompt is kept if the os type is not known
         self.driver_name = self.os_type
 
-        if self.os_version is None:
+        if self.os_version is None and discovery_level != 'minimal':
             self.update_os_version()
 
         # delegate to device
@@ -163,16 +196,18 @@ class Device(object):
 
         # self.prepare_terminal_session()
 
-        if self.udi is None:
-            self.update_udi()
-        if self.family is None:
+        if self.family is None and discovery_level != 'minimal':
             self.update_family()
 
-        if self.platform is None:
-            self.update_platform()
+        if discovery_level == 'full':
+            if self.udi is None:
+                self.update_udi()
+
+            if self.platform is None:
+                self.update_platform()
 
-        if self.is_console is None:
-            self.update_console()
+            if self.is_console is None:
+                self.update_console()
 
         self.enable(self._get_enable_password())
 
@@ -184,7 +219,9 @@ class Device(object):
         self.chain.connection.log("Disconnecting: {}".format(self))
         if self.connected:
             if self.protocol:
-                if self.is_console:
+                # the console is not discovered on connect at the minimal and standard discovery levels,
+                # so the session is left in the global mode if unable to discover
+                if self.mode != 'global' and self.discover('is_console') is not False:
                     while self.mode != 'global':
                         try:
                             self.send('exit', timeout=10)
@@ -196,8 +233,9 @@ class Device(object):
 
             self.connected = False
             self.ctrl = None
+        self._started = None
 
-    def send(self, cmd="", timeout=60, wait_for_string=None, password=False):
+    def send(self, cmd="", timeout=60, wait_for_string=None, password=False, output_callback=None):
         """Send the command to the device and return the output.
 
         Args:
@@ -208,9 +246,11 @@ class Device(object):
                 prompt will be used.
             password (bool): If true cmd representing password is not logged
                 and condoor waits for noecho.
+            output_callback (callable): Optional callable receiving the output
+                chunks as they arrive. The output is not collected then.
 
         Returns:
-            A string containing the command output.
+            A string containing the command output or None if output_callback provided.
 
         Raises:
             ConnectionError: General connection error during command execution
@@ -225,12 +265,26 @@ class Device(object):
             else:
                 self.chain.connection.log("Sending command: '{}'".format(cmd))
 
+            entry = self._index_start("*** Password ***" if password else cmd)
+            outcome = 'error'
             try:
-                output = self.execute_command(cmd, timeout, wait_for_string, password)
+                output = self.execute_command(cmd, timeout, wait_for_string, password, output_callback)
+                outcome = 'ok'
+            except CommandSyntaxError:
+                outcome = 'syntax error'
+                raise
+            except CommandTimeoutError:
+                outcome = 'timeout'
+                raise
             except ConnectionError:
+                outcome = 'disconnected'
                 self.chain.connection.log("Connection lost. Disconnecting.")
                 # self.disconnect()
                 raise
+            finally:
+                if entry is not None:
+                    self._index_end(entry, outcome)
+                self._flush_session_log()
 
             if password:
                 self.chain.connection.log("Password sent successfully")
@@ -242,7 +296,31 @@ class Device(object):
         else:
             raise ConnectionError("Device not connected", host=self.hostname)
 
-    def execute_command(self, cmd, timeout, wait_for_string, password):
+    def _flush_session_log(self):
+        """Write the buffered session log, so the output is not kept buffered while the session is idle."""
+        session_fd = self.chain.session_fd
+        if session_fd is not None and not getattr(session_fd, 'closed', False):
+            # the incomplete line, i.e. the prompt, is written too if supported by the session log object
+            getattr(session_fd, 'sync', session_fd.flush)()
+
+    def _index_start(self, cmd):
+        """Return the session log index entry of the command or None if the session log is not indexed."""
+        session_fd = self.chain.session_fd
+        if not getattr(session_fd, 'index', False):
+            return None
+        entry = {'command': cmd, 'device': self.hostname, 'start_time': time.time()}
+        session_fd.index_start(entry)
+        return entry
+
+    def _index_end(self, entry, outcome):
+        """Write the session log index entry with the command outcome."""
+        entry['end_time'] = time.time()
+        entry['outcome'] = outcome
+        session_fd = self.chain.session_fd
+        if getattr(session_fd, 'index', False):
+            session_fd.index_end(entry)
+
+    def execute_command(self, cmd, timeout, wait_for_string, password, output_callback=None):
         """Execute command."""
         try:
             self.last_command_result = None
@@ -254,15 +332,37 @@ class Device(object):
             if password:
                 cmd = "*** Password ***"
 
-            if not self.driver.wait_for_string(wait_for_string, timeout):
+            collected_callback = None
+            if output_callback is not None and not self.driver.can_stream(cmd):
+                self.chain.connection.log("Output collected before passed to the callback: '{}'".format(cmd))
+                collected_callback, output_callback = output_callback, None
+
+            previous_callback = self.ctrl.output_callback
+            if output_callback is None:
+                self.ctrl.output_callback = None
+            else:
+                self.ctrl.output_callback = lambda data: output_callback(data.replace('\r', ''))
+            try:
+                result = self.driver.wait_for_string(wait_for_string, timeout)
+            finally:
+                self.ctrl.output_callback = previous_callback
+
+            if not result:
                 self.chain.connection.log("Unexpected session disconnect during '{}' command execution".format(cmd))
                 raise ConnectionError("Unexpected session disconnect", host=self.hostname)
 
+            if output_callback is not None:
+                return None
+
             if self.last_command_result:
                 output = self.last_command_result.replace('\r', '')
             else:
                 output = self.ctrl.before.replace('\r', '')
 
+            if collected_callback is not None:
+                collected_callback(output)
+                return None
+
             # not needed. Fixes the issue #11
             # second_line_index = output.find('\n') + 1
             # output = output[second_line_index:]
@@ -290,6 +390,203 @@ class Device(object):
             self.chain.connection.log("Exception {}".format(e))
             raise ConnectionError(message="Unexpected error", host=self.hostname)
 
+    def send_batch(self, cmds, timeout=60):
+        """Send the commands back to back and return the list of outputs.
+
+        The commands are written ahead without waiting for the echo and the prompt, as long as the number of
+        characters of the not completed commands does not exceed the driver batch_window. The output is split
+        on the prompts, so the device must echo the typed ahead command after the prompt (i.e. IOS, IOS XR, NX-OS).
+
+        Args:
+            cmds (list): List of command strings.
+            timeout (int): Timeout in seconds for each command. Defaults to 60s
+
+        Returns:
+            A list with the output string for each command or the CommandSyntaxError instance if the command
+            was rejected by the device.
+
+        Raises:
+            ConnectionError: General connection error during command execution
+            CommandTimeoutError: Timeout during command execution
+
+        """
+        if not self.connected:
+            raise ConnectionError("Device not connected", host=self.hostname)
+
+        # the typed ahead output is not split on the command boundaries in the session log,
+        # so the index entry of each command covers the output of the whole batch
+        entries = [self._index_start(cmd) for cmd in cmds]
+        outcome = 'error'
+        waiting = deque(cmds)
+        in_flight = deque()
+        in_flight_size = 0
+        results = []
+        try:
+            while waiting or in_flight:
+                batch = []
+                while waiting and (not (in_flight or batch) or
+                                   in_flight_size + len(waiting[0]) + 1 <= self.driver.batch_window):
+                    cmd = waiting.popleft()
+                    batch.append(cmd)
+                    in_flight_size += len(cmd) + 1
+                if batch:
+                    self.chain.connection.log("Sending commands: {}".format(batch))
+                    self.ctrl.send_lines(batch)
+                    in_flight.extend(batch)
+
+                cmd = in_flight.popleft()
+                in_flight_size -= len(cmd) + 1
+                results.append(self._receive_batch_output(cmd, timeout))
+            outcome = 'ok'
+        except CommandTimeoutError:
+            outcome = 'timeout'
+            raise
+        except ConnectionError:
+            outcome = 'disconnected'
+            raise
+        finally:
+            for index, entry in enumerate(entries):
+                if entry is not None:
+                    if index < len(results):
+                        self._index_end(entry, 'syntax error' if isinstance(results[index], CommandSyntaxError)
+                                        else 'ok')
+                    else:
+                        self._index_end(entry, outcome)
+            self._flush_session_log()
+        return results
+
+    def send_start(self, cmd, timeout=60):
+        """Send the command to the device and return without waiting for the output.
+
+        The output is processed by :meth:`send_step` called when the session has data to read, i.e. the
+        controller file descriptor is readable, so many devices can be driven from one select loop.
+
+        Args:
+            cmd (str): Command string for execution.
+            timeout (int): Timeout in seconds. Defaults to 60s
+
+        Raises:
+            ConnectionError: General connection error during command execution
+            CommandError: The previous command not completed.
+
+        """
+        if not self.connected:
+            raise ConnectionError("Device not connected", host=self.hostname)
+        if self._started is not None:
+            raise CommandError("Previous command not completed", host=self.hostname,
+                               command=self._started['command'])
+
+        self.chain.connection.log("Sending command: '{}'".format(cmd))
+        entry = self._index_start(cmd)
+        try:
+            self.ctrl.send_lines([cmd])
+        except ConnectionError:
+            if entry is not None:
+                self._index_end(entry, 'disconnected')
+            raise
+        self._started = {'command': cmd, 'deadline': time.time() + timeout, 'entry': entry, 'error': None}
+
+    def send_step(self):
+        """Process the output received so far without waiting for more and return the command output or None.
+
+        None is returned until the prompt is received. The output is the same as returned by :meth:`send_batch`.
+        The prompts of the jumphosts and the paging are handled the same way as by :meth:`send`, but the
+        interactive flows waiting for the specific device response, i.e. the admin plane login, are not supported.
+
+        Raises:
+            ConnectionError: General connection error during command execution
+            CommandSyntaxError: Command syntax error or unknown command.
+            CommandTimeoutError: Timeout passed since :meth:`send_start`
+            CommandError: No command started.
+
+        """
+        started = self._started
+        if started is None:
+            raise CommandError("No command started", host=self.hostname)
+
+        cmd = started['command']
+        output = None
+        outcome = 'error'
+        try:
+            if started['error'] is None:
+                try:
+                    output = self._receive_output(cmd, 0)
+                except CommandSyntaxError as e:  # pylint: disable=invalid-name
+                    self.chain.connection.log("{}: '{}'".format(e.message, cmd))
+                    started['error'] = CommandSyntaxError(e.message, e.hostname, command=cmd)
+                except CommandTimeoutError:
+                    pass
+
+            if started['error'] is not None:
+                # skip the rest of the error message up to the prompt
+                if self.ctrl.expect([self.prompt_re, pexpect.TIMEOUT], timeout=0) == 0:
+                    outcome = 'syntax error'
+                    raise started['error']
+
+            if output is None:
+                if time.time() < started['deadline']:
+                    outcome = None
+                    return None
+                self.chain.connection.log("Command timeout: '{}'".format(cmd))
+                outcome = 'timeout'
+                raise CommandTimeoutError(message="Command timeout", host=self.hostname, command=cmd)
+
+            outcome = 'ok'
+            return output
+
+        except pexpect.EOF:
+            outcome = 'disconnected'
+            self.chain.connection.log("Unexpected session disconnect")
+            raise ConnectionError("Unexpected session disconnect", host=self.hostname)
+
+        except ConnectionError:
+            outcome = 'disconnected'
+            raise
+
+        finally:
+            if outcome is not None:
+                self._started = None
+                if started['entry'] is not None:
+                    self._index_end(started['entry'], outcome)
+                self._flush_session_log()
+
+    def _receive_output(self, cmd, timeout):
+        """Wait for the prompt and return the output of the command sent ahead without the echo."""
+        self.last_command_result = None
+        if not self.driver.wait_for_string(self.prompt_re, timeout):
+            raise ConnectionError("Unexpected session disconnect", host=self.hostname)
+
+        output = self.ctrl.before
+        index = output.find(cmd)
+        if index >= 0 and not output[:index].strip():
+            output = output[index + len(cmd):]
+        else:
+            # remove the garbled echo but keep the new line
+            output = output[output.find('\n'):]
+        self.chain.connection.log("Command executed successfully: '{}'".format(cmd))
+        return output.replace('\r', '')
+
+    def _receive_batch_output(self, cmd, timeout):
+        """Wait for the prompt and return the command output without the echo."""
+        try:
+            return self._receive_output(cmd, timeout)
+
+        except CommandSyntaxError as e:  # pylint: disable=invalid-name
+            self.chain.connection.log("{}: '{}'".format(e.message, cmd))
+            # skip the rest of the error message up to the prompt
+            if self.ctrl.expect([self.prompt_re, pexpect.TIMEOUT], timeout=timeout) != 0:
+                raise CommandTimeoutError(message="Command timeout", host=self.hostname, command=cmd)
+            # the separate instance for every rejected command in the batch
+            return CommandSyntaxError(e.message, e.hostname, command=cmd)
+
+        except (CommandTimeoutError, pexpect.TIMEOUT):
+            self.chain.connection.log("Command timeout: '{}'".format(cmd))
+            raise CommandTimeoutError(message="Command timeout", host=self.hostname, command=cmd)
+
+        except pexpect.EOF:
+            self.chain.connection.log("Unexpected session disconnect")
+            raise ConnectionError("Unexpected session disconnect", host=self.hostname)
+
     @property
     def driver_name(self):
         """Return driver name or None."""
@@ -375,6 +672,18 @@ class Device(object):
                 self.chain.connection.log("Users text not collected")
         return self._users_text
 
+    def discover(self, attribute):
+        """Return the device attribute collecting it first if not discovered on connect.
+
+        The attribute is collected only if the device is connected, otherwise the known value or None is returned.
+        """
+        if getattr(self, attribute) is None and self.connected:
+            self.chain.connection.log("Discovering: {}".format(attribute))
+            if attribute == 'platform' and self.udi is None:
+                self.update_udi()
+            getattr(self, self._updaters[attribute])()
+        return getattr(self, attribute)
+
     def get_protocol_name(self):
         """Provide protocol name based on node_info."""
         protocol_name = self.node_info.protocol
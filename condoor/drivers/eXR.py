@@ -16,6 +16,7 @@ from condoor import pattern_manager, EOF
 from condoor.config import CONF
 
 _C = CONF['driver']['eXR']
+_GC = CONF['driver']['generic']
 
 
 class Driver(XRDriver):
@@ -80,8 +81,25 @@ class Driver(XRDriver):
             self.log('No inventory command for {}'.format(self.platform))
         return inventory_text
 
+    def can_stream(self, cmd):
+        """Return False for the admin command executed in Calvados.
+
+        Its output is extracted from the Calvados session output by a_store_cmd_result when the command completes.
+        """
+        return not cmd.startswith("admin ")
+
     def wait_for_string(self, expected_string, timeout=60):
         """Wait for string FSM for XR 64 bit."""
+        previous_prompts = self.device.get_previous_prompts()  # without target prompt
+        self.log("Expecting: {}".format(pattern_to_str(expected_string)))
+        self.log("Calvados prompt: {}".format(pattern_to_str(self.calvados_re)))
+
+        # timeout is a part of the key as it is used in the transition table
+        key = (expected_string, tuple(previous_prompts), timeout)
+        fsm = self._cached_fsm(key)
+        if fsm is not None:
+            return fsm.run()
+
         ADMIN_USERNAME_PROMPT = re.compile("Admin Username:")
         ADMIN_PASSWORD_PROMPT = re.compile("Password:")
 
@@ -94,10 +112,7 @@ class Driver(XRDriver):
                   self.calvados_connect_re, self.calvados_term_length, ADMIN_USERNAME_PROMPT, ADMIN_PASSWORD_PROMPT]
 
         # add detected prompts chain
-        events += self.device.get_previous_prompts()  # without target prompt
-
-        self.log("Expecting: {}".format(pattern_to_str(expected_string)))
-        self.log("Calvados prompt: {}".format(pattern_to_str(self.calvados_re)))
+        events += previous_prompts
 
         transitions = [
             (ADMIN_USERNAME_PROMPT, [0], 6, partial(a_send_username, self.device.node_info.username), 5),
@@ -125,10 +140,11 @@ class Driver(XRDriver):
             (self.calvados_re, [5], 0, a_store_cmd_result, 0),
         ]
 
-        for prompt in self.device.get_previous_prompts():
+        for prompt in previous_prompts:
             transitions.append((prompt, [0, 1], 0, a_unexpected_prompt, 0))
 
-        fsm = FSM("WAIT-4-STRING", self.device, events, transitions, timeout=timeout)
+        fsm = self._cache_fsm(key, FSM("WAIT-4-STRING", self.device, events, transitions, timeout=timeout,
+                                       searchwindowsize=_GC['searchwindowsize']))
         return fsm.run()
 
     def reload(self, reload_timeout, save_config):
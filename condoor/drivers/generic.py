@@ -13,6 +13,12 @@ from condoor import pattern_manager
 from condoor.config import CONF
 
 
+_C = CONF['driver']['generic']
+
+# max number of cached wait_for_string state machines per driver
+_FSM_CACHE_SIZE = 16
+
+
 class Driver(object):
     """This is generic Driver class implementation."""
 
@@ -23,6 +29,10 @@ class Driver(object):
     prepare_terminal_session = ['terminal len 0']
     config_cmd = 'configure terminal'
     families = {}
+    # max number of command characters sent ahead by send_batch and not yet completed
+    batch_window = _C['batch_window']
+    # seconds to wait for the cached prompt after pressing enter before falling back to the prompt detection
+    prompt_validation_timeout = _C['prompt_validation_timeout']
 
     def __init__(self, device):
         """Initialize the Driver object."""
@@ -56,6 +66,9 @@ class Driver(object):
         self.platform_string = ""
         self.raw_family = None
 
+        self._fsm_cache = {}
+        self._fsm_cache_state = None
+
     def __repr__(self):
         """Return the string representation of the driver class."""
         return str(self.platform)
@@ -203,36 +216,64 @@ class Driver(object):
         # Do not update the driver if not target device
         return pattern_manager.platform(prompt) if self.device.is_target else None
 
+    def can_stream(self, cmd):  # pylint: disable=no-self-use,unused-argument
+        """Return True if the command output can be passed to the output callback as it arrives."""
+        return True
+
     def wait_for_string(self, expected_string, timeout=60):
         """Wait for string FSM."""
-        #                    0                         1                        2                        3
-        events = [self.syntax_error_re, self.connection_closed_re, expected_string, self.press_return_re,
-                  #        4           5                 6                7
-                  self.more_re, pexpect.TIMEOUT, pexpect.EOF, self.buffer_overflow_re]
-
-        # add detected prompts chain
-        events += self.device.get_previous_prompts()  # without target prompt
-
+        previous_prompts = self.device.get_previous_prompts()  # without target prompt
         self.log("Expecting: {}".format(pattern_to_str(expected_string)))
 
-        transitions = [
-            (self.syntax_error_re, [0], -1, CommandSyntaxError("Command unknown", self.device.hostname), 0),
-            (self.connection_closed_re, [0], 1, a_connection_closed, 10),
-            (pexpect.TIMEOUT, [0], -1, CommandTimeoutError("Timeout waiting for prompt", self.device.hostname), 0),
-            (pexpect.EOF, [0, 1], -1, ConnectionError("Unexpected device disconnect", self.device.hostname), 0),
-            (self.more_re, [0], 0, partial(a_send, " "), 10),
-            (expected_string, [0, 1], -1, a_expected_prompt, 0),
-            (self.press_return_re, [0], -1, a_stays_connected, 0),
-            # TODO: Customize in XR driver
-            (self.buffer_overflow_re, [0], -1, CommandSyntaxError("Command too long", self.device.hostname), 0)
-        ]
-
-        for prompt in self.device.get_previous_prompts():
-            transitions.append((prompt, [0, 1], 0, a_unexpected_prompt, 0))
-
-        fsm = FSM("WAIT-4-STRING", self.device, events, transitions, timeout=timeout)
+        key = (expected_string, tuple(previous_prompts))
+        fsm = self._cached_fsm(key)
+        if fsm is None:
+            #                    0                         1                        2                        3
+            events = [self.syntax_error_re, self.connection_closed_re, expected_string, self.press_return_re,
+                      #        4           5                 6                7
+                      self.more_re, pexpect.TIMEOUT, pexpect.EOF, self.buffer_overflow_re]
+
+            # add detected prompts chain
+            events += previous_prompts
+
+            transitions = [
+                (self.syntax_error_re, [0], -1, CommandSyntaxError("Command unknown", self.device.hostname), 0),
+                (self.connection_closed_re, [0], 1, a_connection_closed, 10),
+                (pexpect.TIMEOUT, [0], -1, CommandTimeoutError("Timeout waiting for prompt", self.device.hostname), 0),
+                (pexpect.EOF, [0, 1], -1, ConnectionError("Unexpected device disconnect", self.device.hostname), 0),
+                (self.more_re, [0], 0, partial(a_send, " "), 10),
+                (expected_string, [0, 1], -1, a_expected_prompt, 0),
+                (self.press_return_re, [0], -1, a_stays_connected, 0),
+                # TODO: Customize in XR driver
+                (self.buffer_overflow_re, [0], -1, CommandSyntaxError("Command too long", self.device.hostname), 0)
+            ]
+
+            for prompt in previous_prompts:
+                transitions.append((prompt, [0, 1], 0, a_unexpected_prompt, 0))
+
+            fsm = self._cache_fsm(key, FSM("WAIT-4-STRING", self.device, events, transitions, timeout=timeout,
+                                           searchwindowsize=_C['searchwindowsize']))
+        fsm.timeout = timeout
         return fsm.run()
 
+    def _cached_fsm(self, key):
+        """Return the cached FSM for the key or None.
+
+        The cache is invalidated when the device controller or hostname changes.
+        """
+        state = (self.device.ctrl, self.device.hostname)
+        if state != self._fsm_cache_state:
+            self._fsm_cache.clear()
+            self._fsm_cache_state = state
+        return self._fsm_cache.get(key)
+
+    def _cache_fsm(self, key, fsm):
+        """Store the FSM in the cache and return it."""
+        if len(self._fsm_cache) >= _FSM_CACHE_SIZE:
+            self._fsm_cache.clear()
+        self._fsm_cache[key] = fsm
+        return fsm
+
     # def send_xml(self, command, timeout=60):
     #     """
     #     Handle error i.e.
@@ -1,12 +1,15 @@
 """Provides Finite State Machine implementation."""
 
+from copy import copy
 from inspect import isclass
 from functools import wraps
 from time import time
 
 from pexpect import EOF
 from condoor.exceptions import ConnectionError
-from condoor.utils import pattern_to_str
+from condoor.utils import pattern_to_str, to_list
+from condoor.searcher import Searcher
+from condoor.trace import Transition
 
 
 def action(func):
@@ -26,9 +29,9 @@ def action(func):
                 ctx = None
         if ctx:
             if func.__doc__ is None:
-                ctx.device.chain.connection.log("A={}".format(func.__name__))
+                ctx.device.chain.connection.log("A={}", func.__name__)
             else:
-                ctx.device.chain.connection.log("A={}".format(func.__doc__.split('\n', 1)[0]))
+                ctx.device.chain.connection.log("A={}", func.__doc__.split('\n', 1)[0])
         return func(*args, **kwargs)
     return call_action
 
@@ -117,7 +120,7 @@ class FSM(object):
         - next_state (int): Next state for FSM transition.
         - action (func): function to be executed if the current FSM state belongs to `list_of_states` and the `event`
           occurred. The action can be also *None* then FSM transits to the next state without any action. Action
-          can be also the exception, which is raised and FSM stops.
+          can be also the exception. Its copy is raised and FSM stops, so the raised instances are never shared.
         """
         self.events = events
         self.device = device
@@ -130,6 +133,7 @@ class FSM(object):
         self.log = device.chain.connection.log
 
         self.transition_table = self._compile(transitions, events)
+        self.searcher = Searcher(to_list(events))
 
     def _compile(self, transitions, events):
         compiled = {}
@@ -157,15 +161,18 @@ class FSM(object):
 
         """
         ctx = FSM.Context(self.name, self.device)
+        connection = self.device.chain.connection
+        stats = connection.fsm_stats
+        sink = connection.trace_sink
         transition_counter = 0
         timeout = self.timeout
-        self.log("{} Start".format(self.name))
+        self.log("{} Start", self.name)
         while transition_counter < self.max_transitions:
             transition_counter += 1
             try:
                 start_time = time()
                 if self.init_pattern is None:
-                    ctx.event = self.ctrl.expect(self.events, searchwindowsize=self.searchwindowsize, timeout=timeout)
+                    ctx.event = self.ctrl.expect(self.searcher, searchwindowsize=self.searchwindowsize, timeout=timeout)
                 else:
                     self.log("INIT_PATTERN={}".format(pattern_to_str(self.init_pattern)))
                     try:
@@ -183,36 +190,60 @@ class FSM(object):
                 if key in self.transition_table:
                     transition = self.transition_table[key]
                     next_state, action_instance, next_timeout = transition
-                    self.log("E={},S={},T={},RT={:.2f}".format(ctx.event, ctx.state, timeout, finish_time))
-                    if callable(action_instance) and not isclass(action_instance):
-                        if not action_instance(ctx):
-                            self.log("Error: {}".format(ctx.msg))
-                            return False
-                    elif isinstance(action_instance, Exception):
-                        self.log("A=Exception {}".format(action_instance))
-                        raise action_instance
-                    elif action_instance is None:
-                        self.log("A=None")
-                    else:
-                        self.log("FSM Action is not callable: {}".format(str(action_instance)))
-                        raise RuntimeWarning("FSM Action is not callable")
+                    self.log("E={},S={},T={},RT={:.2f}", ctx.event, ctx.state, timeout, finish_time)
+                    stats.record(self.name, ctx.state, finish_time)
+                    trace = self._transition(ctx, next_state, finish_time) if sink else None
+                    action_start = time()
+                    try:
+                        if callable(action_instance) and not isclass(action_instance):
+                            if not action_instance(ctx):
+                                self.log("Error: {}", ctx.msg)
+                                return False
+                        elif isinstance(action_instance, Exception):
+                            self.log("A=Exception {}", action_instance)
+                            # the new instance, as the caller may update it, i.e. set the command
+                            raise copy(action_instance)
+                        elif action_instance is None:
+                            self.log("A=None")
+                        else:
+                            self.log("FSM Action is not callable: {}".format(str(action_instance)))
+                            raise RuntimeWarning("FSM Action is not callable")
+                    finally:
+                        if trace:
+                            sink.emit(trace._replace(action_time=time() - action_start))
 
                     if next_timeout != 0:  # no change if set to 0
                         timeout = next_timeout
                     ctx.state = next_state
-                    self.log("NS={},NT={}".format(next_state, timeout))
+                    self.log("NS={},NT={}", next_state, timeout)
 
                 else:
-                    self.log("Unknown transition: EVENT={},STATE={}".format(ctx.event, ctx.state))
+                    self.log("Unknown transition: EVENT={},STATE={}", ctx.event, ctx.state)
                     continue
 
             except EOF:
                 raise ConnectionError("Session closed unexpectedly", self.ctrl.hostname)
 
             if ctx.finished or next_state == -1:
-                self.log("{} Stop at E={},S={}".format(self.name, ctx.event, ctx.state))
+                self.log("{} Stop at E={},S={}", self.name, ctx.event, ctx.state)
                 return True
 
         # check while else if even exists
         self.log("FSM looped. Exiting")
         return False
+
+    def _transition(self, ctx, next_state, response_time):
+        """Return the transition record without the action time."""
+        consumed = 0
+        for text in (getattr(self.ctrl, 'before', None), getattr(self.ctrl, 'after', None)):
+            if isinstance(text, basestring):
+                consumed += len(text)
+        pattern = ctx.pattern
+        if isinstance(pattern, basestring) or hasattr(pattern, 'pattern'):
+            pattern = pattern_to_str(pattern)
+        else:
+            # i.e. pexpect.TIMEOUT
+            pattern = getattr(pattern, '__name__', str(pattern))
+        return Transition(fsm=self.name, device=self.ctrl.hostname, state=ctx.state, event=ctx.event,
+                          pattern=pattern, next_state=next_state, response_time=response_time, bytes=consumed,
+                          action_time=0.0, timestamp=time())
@@ -29,6 +29,10 @@ def make_hop_info_from_url(url, verify_reachability=None):
             systems, i.e. enable password for IOS devices.:
             telnet://<username>:<password>@<host>:<port>/<enable_password>
             <enable_password> is optional
+            The optional transport query parameter selects the session
+            transport for the first hop, i.e. ssh://host/?transport=native
+            opens the in-process SSH session instead of spawning the ssh
+            command.
 
         verify_reachability: This is optional callable returning boolean
             if node is reachable. It can be used to verify reachability
@@ -49,6 +53,11 @@ def make_hop_info_from_url(url, verify_reachability=None):
     except KeyError:
         enable_password = None
 
+    try:
+        transport = parse_qs(parsed.query)["transport"][0]
+    except KeyError:
+        transport = None
+
     hop_info = HopInfo(
         parsed.scheme,
         parsed.hostname,
@@ -56,7 +65,8 @@ def make_hop_info_from_url(url, verify_reachability=None):
         password,
         parsed.port,
         enable_password,
-        verify_reachability=verify_reachability
+        verify_reachability=verify_reachability,
+        transport=transport
     )
     if hop_info.is_valid():
         return hop_info
@@ -77,7 +87,8 @@ class HopInfo(object):
             password=None,
             port=None,
             enable_password=None,
-            verify_reachability=None):
+            verify_reachability=None,
+            transport=None):
         """
         Initialize the HopInfo object.
 
@@ -96,6 +107,8 @@ class HopInfo(object):
                 reachability of the node before making a connection.
                 It can speedup the connection process when node not
                 reachable especially with telnet having long timeout.
+            transport (str): Optional session transport: 'spawn' or 'native'.
+                If not provided the protocol default from configuration is used.
         """
         self.hostname = hostname
         self.username = username
@@ -108,6 +121,7 @@ class HopInfo(object):
             protocol2port_map.get(self.protocol, None)
 
         self.verify_reachability = verify_reachability
+        self.transport = transport
 
     def is_valid(self):
         """Return if protocol is valid."""
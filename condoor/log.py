@@ -1,54 +1,103 @@
 """Provides File Logger class."""
+import logging
+import os
 import sys
+import threading
 import time
-import os
 
 
-def currentframe():
-    """Return the frame object for the caller's stack frame."""
-    try:
-        raise Exception
-    except:  # noqa
-        return sys.exc_info()[2].tb_frame.f_back
+# the code filename -> module name used in the log line
+_module_names = {}
 
 
-_srcfile = os.path.normcase(currentframe.__code__.co_filename)
+def _module_name(pathname):
+    try:
+        mod = _module_names[pathname]
+    except KeyError:
+        try:
+            mod = os.path.splitext(".".join(map(os.path.basename, os.path.split(pathname))))[:-1][0]
+        except (TypeError, ValueError, AttributeError):
+            mod = "Unknown module"
+        _module_names[pathname] = mod
+    return mod
 
 
-def find_caller():
-    """Find the caller on the stack frame."""
-    f = currentframe()
-    if f is not None:
-        f = f.f_back
-    rv = "(unknown file)", 0, "(unknown function)"
-    while hasattr(f, "f_code"):
-        co = f.f_code
-        filename = os.path.normcase(co.co_filename)
-        if filename == _srcfile:
-            f = f.f_back
-            continue
-        rv = (co.co_filename, f.f_lineno, co.co_name)
-        break
-    return rv
+class FileLogger(object):
+    """File Logger class.
 
+    The message is logged only if its level is at least the logger level. The level 0 (NOTSET) disables
+    logging. The positional arguments are applied to the message with ``str.format`` only if it gets logged,
+    so the callers on the hot path pass the arguments instead of formatting the message themselves::
 
-class FileLogger(object):
-    """File Logger class."""
+        connection.log("E={},S={}", event, state)
+
+    The lines are buffered and written to the file if the buffer exceeds buffer_size characters,
+    flush_interval seconds passed since the last write or the message level is INFO or higher.
+    """
 
-    def __init__(self, fd):
+    def __init__(self, fd, level=logging.DEBUG, buffer_size=16384, flush_interval=1.0):
         """Initialize FileLogger object with File Descriptor."""
         self._fd = fd
+        self.level = level
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered = 0
+        self._last_write = time.time()
+        self._second = None
+        self._timestamp = None
+
+    def __call__(self, msg, *args, **kwargs):
+        """Log the debug message."""
+        if 0 < self.level <= logging.DEBUG:
+            self._log(logging.DEBUG, msg, args, kwargs, sys._getframe(1))  # pylint: disable=protected-access
+
+    def log(self, level, msg, *args, **kwargs):
+        """Log the message with the level."""
+        if 0 < self.level <= level:
+            self._log(level, msg, args, kwargs, sys._getframe(1))  # pylint: disable=protected-access
+
+    def is_enabled_for(self, level):
+        """Return True if the message with the level would be logged."""
+        return 0 < self.level <= level
+
+    def flush(self):
+        """Write the buffered lines to the file."""
+        with self._lock:
+            self._write(time.time())
+
+    def _log(self, level, msg, args, kwargs, frame):
+        if not self._fd or self._fd.closed:
+            return
+        if args:
+            msg = msg.format(*args)
+        if kwargs.get('exc_info'):
+            msg = "{}: {}".format(msg, kwargs['exc_info'])
+
+        code = frame.f_code
+        mod = _module_name(code.co_filename)
+        ct = time.time()
+        second = int(ct)
+        with self._lock:
+            if second != self._second:
+                self._second = second
+                self._timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ct))
+            line = "%s,%03d %s:%s(%s): %s\n" % (self._timestamp, (ct - second) * 1000, mod, code.co_name,
+                                                frame.f_lineno, msg)
+            self._buffer.append(line)
+            self._buffered += len(line)
+            if level >= logging.INFO or self._buffered >= self.buffer_size or \
+                    ct - self._last_write >= self.flush_interval:
+                self._write(ct)
 
-    def __call__(self, msg):
-        """Log the message."""
+    def _write(self, now):
+        self._last_write = now
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        del self._buffer[:]
+        self._buffered = 0
         if self._fd and not self._fd.closed:
-            ct = time.time()
-            msecs = (ct - long(ct)) * 1000
-            pathname, lineno, name = find_caller()
-            try:
-                mod = os.path.splitext(".".join(map(os.path.basename, os.path.split(pathname))))[:-1][0]
-            except (TypeError, ValueError, AttributeError):
-                mod = "Unknown module"
-            ts = time.strftime("%Y-%m-%d %H:%M:%S", (time.localtime(ct)))
-            self._fd.write("%s,%03d %s:%s(%s): %s\n" % (ts, msecs, mod, name, lineno, msg))
+            self._fd.write(data)
             self._fd.flush()
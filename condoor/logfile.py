@@ -0,0 +1,396 @@
+"""Provides the rotating log file with the compressed segments and the reader opening them in order."""
+
+import atexit
+import codecs
+import gzip
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from Queue import Queue
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+# the rotated segment suffix: .<date>-<time>[-<sequence>][.gz|.zst]
+_SEGMENT_RE = re.compile(r"\.(\d{8}-\d{6})(?:-(\d+))?(\.gz|\.zst)?$")
+
+_CHUNK_SIZE = 65536
+
+# serializes the rotation of the files shared by the connections in the process
+_rotate_lock = threading.Lock()
+
+
+def _check_compression(compression):
+    if compression not in (None, 'gzip', 'zstd'):
+        raise ValueError("Unknown log compression: {}".format(compression))
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError("The zstd log compression requires the zstandard package")
+
+
+def is_compressed(path):
+    """Return True if the path is the compressed segment."""
+    return path.endswith(tuple(_EXTENSIONS.values()))
+
+
+def index_path(path):
+    """Return the command index sidecar file path of the log file or its rotated, possibly compressed segment."""
+    if is_compressed(path):
+        path = os.path.splitext(path)[0]
+    return path + '.idx'
+
+
+def compress_file(path, compression):
+    """Compress the file in chunks to the file with the compression extension and remove the original file.
+
+    The compressed data is written to the temporary file renamed when complete, so the readers never see the
+    partially compressed segment.
+    """
+    target = path + _EXTENSIONS[compression]
+    temporary = target + '.tmp'
+    with open(path, 'rb') as source:
+        if compression == 'gzip':
+            with open(temporary, 'wb') as raw:
+                compressed = gzip.GzipFile(filename=os.path.basename(path), mode='wb', fileobj=raw)
+                shutil.copyfileobj(source, compressed, _CHUNK_SIZE)
+                compressed.close()
+        else:
+            with open(temporary, 'wb') as raw:
+                zstandard.ZstdCompressor().copy_stream(source, raw, read_size=_CHUNK_SIZE, write_size=_CHUNK_SIZE)
+    os.rename(temporary, target)
+    os.unlink(path)
+    return target
+
+
+class _Compressor(object):
+    """The background thread compressing the rotated segments, so the compression never blocks the I/O."""
+
+    def __init__(self):
+        """Initialize the _Compressor object."""
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def submit(self, path, compression):
+        """Queue the segment to be compressed."""
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._queue = Queue()
+                self._thread = threading.Thread(target=self._run, name="condoor-log-compressor")
+                self._thread.daemon = True
+                self._thread.start()
+            self._queue.put((path, compression))
+
+    def join(self):
+        """Wait until the queued segments are compressed."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            path, compression = self._queue.get()
+            try:
+                compress_file(path, compression)
+            except (IOError, OSError) as err:
+                sys.stderr.write("Unable to compress log file: {}: {}\n".format(path, err))
+            finally:
+                self._queue.task_done()
+
+
+_compressor = _Compressor()
+atexit.register(_compressor.join)
+
+
+def _segments(filename):
+    """Return the dictionary of the rotated segment paths keyed by (<date>-<time>, <sequence>)."""
+    directory, base = os.path.split(os.path.abspath(filename))
+    found = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return found
+    for name in names:
+        if not name.startswith(base):
+            continue
+        match = _SEGMENT_RE.match(name[len(base):])
+        if match is None:
+            continue
+        key = (match.group(1), int(match.group(2) or 0))
+        # prefer the uncompressed file, which is complete, over the compressed one not yet finished
+        if key not in found or match.group(3) is None:
+            found[key] = os.path.join(directory, name)
+    return found
+
+
+def segments(filename):
+    """Return the paths of the rotated segments of the log file, the oldest first.
+
+    The segment still being compressed is returned once, uncompressed.
+    """
+    found = _segments(filename)
+    return [found[key] for key in sorted(found)]
+
+
+class RotatingFile(object):
+    """The append only log file rotated by size or time.
+
+    The file is renamed to <filename>.<date>-<time> when it exceeds max_bytes or interval seconds passed since
+    it was opened or rotated. The rotated segment is compressed with gzip or zstd by the background thread and
+    the oldest segments above backup_count are removed. The file renamed by the other object rotating the same
+    path is reopened on the next write, like by the :class:`logging.handlers.WatchedFileHandler`.
+    """
+
+    def __init__(self, filename, mode="a", encoding=None, max_bytes=0, interval=0, backup_count=0,
+                 compression=None):
+        """Initialize the RotatingFile object and open the file.
+
+        Args:
+            filename (str): The log file name.
+            mode (str): The file mode. The file is always appended to.
+            encoding (str): The file encoding or None for the byte string file.
+            max_bytes (int): Rotate the file if exceeds the size. 0 means no size limit.
+            interval (float): Rotate the file after the number of seconds. 0 means no time limit.
+            backup_count (int): The number of the rotated segments to keep. 0 means all.
+            compression (str): The rotated segment compression: 'gzip', 'zstd' or None.
+        """
+        _check_compression(compression)
+        self.name = filename
+        self.mode = mode
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compression = compression
+        self.rotations = 0
+        # rotate only in rotate_if_needed, i.e. between the commands, unless the file exceeds twice max_bytes
+        self.defer_rotation = False
+        self._file = None
+        self._open()
+        if compression:
+            # the segments left uncompressed i.e. by the killed process
+            for path in segments(filename):
+                if not is_compressed(path):
+                    _compressor.submit(path, compression)
+
+    @property
+    def closed(self):
+        """Return True if the file is closed."""
+        return self._file.closed
+
+    def write(self, data):
+        """Write the data to the file and rotate it if needed."""
+        if self._file.closed:
+            raise ValueError("I/O operation on closed file")
+        self._reopen_if_moved()
+        self._file.write(data)
+        self._size += len(data)
+        if not self.defer_rotation or (self.max_bytes and self._size >= 2 * self.max_bytes):
+            self.rotate_if_needed()
+
+    def rotate_if_needed(self):
+        """Rotate the file if it exceeds max_bytes or interval seconds passed."""
+        if (self.max_bytes and self._size >= self.max_bytes) or (self.interval and time.time() >= self._rotate_at):
+            self.rotate()
+
+    def flush(self):
+        """Flush the file."""
+        self._file.flush()
+
+    def tell(self):
+        """Return the current file position."""
+        return self._file.tell()
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+    def rotate(self):
+        """Rename the file to the segment, queue its compression and open the new file."""
+        with _rotate_lock:
+            moved = self._moved()
+            self._file.close()
+            if not moved:
+                path = self._segment_name()
+                os.rename(self.name, path)
+                # the command index sidecar file written by condoor.utils.FilteredFile
+                if os.path.exists(index_path(self.name)):
+                    os.rename(index_path(self.name), index_path(path))
+                if self.compression:
+                    _compressor.submit(path, self.compression)
+                self._prune()
+            self._open()
+            self.rotations += 1
+
+    def _open(self):
+        if self.encoding is None:
+            self._file = open(self.name, self.mode)
+        else:
+            self._file = codecs.open(self.name, self.mode, encoding=self.encoding)
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._rotate_at = time.time() + self.interval
+
+    def _moved(self):
+        try:
+            return os.stat(self.name).st_ino != os.fstat(self._file.fileno()).st_ino
+        except (OSError, ValueError):
+            return True
+
+    def _reopen_if_moved(self):
+        if self._moved():
+            with _rotate_lock:
+                self._file.close()
+                self._open()
+                self.rotations += 1
+
+    def _segment_name(self):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        # the sequence is above the segments already rotated in the same second
+        sequences = [sequence for segment_stamp, sequence in _segments(self.name) if segment_stamp == stamp]
+        if not sequences:
+            return "{}.{}".format(self.name, stamp)
+        return "{}.{}-{}".format(self.name, stamp, max(sequences) + 1)
+
+    def _prune(self):
+        if not self.backup_count:
+            return
+        for path in segments(self.name)[:-self.backup_count]:
+            for name in (path, index_path(path)):
+                try:
+                    os.unlink(name)
+                except OSError:
+                    pass
+
+
+class LogReader(object):
+    """The file like object reading the rotated segments of the log file in order and then the log file.
+
+    The gzip and zstd compressed segments are decompressed transparently.
+    """
+
+    def __init__(self, filename):
+        """Initialize the LogReader object."""
+        self.name = filename
+        self.paths = segments(filename)
+        if os.path.exists(filename):
+            self.paths.append(filename)
+        self._index = 0
+        self._file = None
+        self._buffer = ""
+        self.closed = False
+
+    def read(self, size=-1):
+        """Read at most size bytes or everything if size is negative."""
+        chunks = []
+        if size < 0:
+            chunks.append(self._buffer)
+            self._buffer = ""
+            while True:
+                data = self._read_chunk()
+                if not data:
+                    break
+                chunks.append(data)
+            return "".join(chunks)
+
+        while len(self._buffer) < size:
+            data = self._read_chunk()
+            if not data:
+                break
+            self._buffer += data
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self):
+        """Read the single line. The line may span the segments."""
+        while True:
+            index = self._buffer.find('\n')
+            if index != -1:
+                line, self._buffer = self._buffer[:index + 1], self._buffer[index + 1:]
+                return line
+            data = self._read_chunk()
+            if not data:
+                line, self._buffer = self._buffer, ""
+                return line
+            self._buffer += data
+
+    def __iter__(self):
+        """Iterate over the lines."""
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def close(self):
+        """Close the current segment."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.closed = True
+
+    def __enter__(self):
+        """Enter the context."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Exit from context."""
+        self.close()
+
+    def _read_chunk(self):
+        while True:
+            if self._file is None:
+                if self._index >= len(self.paths):
+                    return ""
+                self._file = open_segment(self.paths[self._index])
+                self._index += 1
+            data = self._file.read(_CHUNK_SIZE)
+            if data:
+                return data
+            self._file.close()
+            self._file = None
+
+
+def open_segment(path):
+    """Return the file object reading the segment, decompressed if needed."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise IOError("The zstandard package required to read: {}".format(path))
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+    return open(path, 'rb')
+
+
+def open_log(filename):
+    """Return the :class:`LogReader` object reading the log file and its rotated segments in order."""
+    return LogReader(filename)
+
+
+def main():
+    """Write the log file with its rotated segments to the standard output, i.e. python -m condoor.logfile."""
+    if len(sys.argv) < 2:
+        sys.stderr.write("Usage: python -m condoor.logfile <log file> [<log file> ...]\n")
+        return 1
+    for filename in sys.argv[1:]:
+        with open_log(filename) as log:
+            while True:
+                data = log.read(_CHUNK_SIZE)
+                if not data:
+                    break
+                sys.stdout.write(data)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
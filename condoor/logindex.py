@@ -0,0 +1,158 @@
+"""Provides the lookup of the command output in the session log using the command index sidecar file.
+
+The session log written with the log index option enabled is accompanied by the <session log>.idx file with
+the JSON line per command sent by :meth:`condoor.Device.send`, i.e.::
+
+    {"command": "show version", "device": "router", "start": 1024, "end": 4096, "start_time": 1476691730.5,
+     "end_time": 1476691731.2, "outcome": "ok"}
+
+The command line interface prints the command output or lists the indexed commands::
+
+    python -m condoor.logindex session.log "show version" --device router
+    python -m condoor.logindex session.log --list
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+from collections import namedtuple
+
+from condoor.logfile import index_path, segments, is_compressed, open_segment
+
+#: The session log index entry.
+#:
+#: - **command** (str): The command string or "*** Password ***" for the password.
+#: - **device** (str): The device hostname.
+#: - **start** (int): The log file offset where the command output starts, i.e. at the command echo.
+#: - **end** (int): The log file offset where the command output ends including the next prompt.
+#: - **start_time** (float): The time when the command was sent.
+#: - **end_time** (float): The time when the command completed.
+#: - **outcome** (str): 'ok', 'syntax error', 'timeout', 'disconnected' or 'error'.
+Entry = namedtuple('Entry', 'command device start end start_time end_time outcome')
+
+
+def read_index(filename):
+    """Return the list of :data:`Entry` records of the log file. The incomplete last line is skipped."""
+    entries = []
+    try:
+        with open(index_path(filename)) as index:
+            for line in index:
+                try:
+                    record = json.loads(line)
+                    entries.append(Entry(*[record.get(field) for field in Entry._fields]))
+                except ValueError:
+                    continue
+    except IOError:
+        pass
+    return entries
+
+
+class LogIndex(object):
+    """The session log with its command index.
+
+    The index is loaded once and the plain log file is memory mapped, so the command output is returned
+    without reading or scanning the log. The compressed rotated segment is decompressed on first access.
+    """
+
+    def __init__(self, filename):
+        """Initialize the LogIndex object and load the index of the log file or its rotated segment."""
+        self.filename = filename
+        self.entries = read_index(filename)
+        self._commands = {}
+        for entry in self.entries:
+            self._commands.setdefault(entry.command, []).append(entry)
+            self._commands.setdefault((entry.device, entry.command), []).append(entry)
+        self._file = None
+        self._data = None
+
+    def find(self, command, device=None):
+        """Return the list of the index entries of the command, optionally only sent to the device."""
+        return list(self._commands.get(command if device is None else (device, command), []))
+
+    def output(self, entry):
+        """Return the session log text of the index entry."""
+        return self._log()[entry.start:entry.end]
+
+    def close(self):
+        """Unmap and close the log file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._data = None
+
+    def __enter__(self):
+        """Enter the context."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Exit from context."""
+        self.close()
+
+    def _log(self):
+        if self._data is None:
+            if is_compressed(self.filename):
+                log = open_segment(self.filename)
+                try:
+                    self._data = log.read()
+                finally:
+                    log.close()
+            else:
+                self._file = open(self.filename, 'rb')
+                if os.fstat(self._file.fileno()).st_size:
+                    self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    self._data = ""
+        return self._data
+
+
+def open_indexes(filename):
+    """Return the list of :class:`LogIndex` objects of the rotated segments and the log file, the oldest first."""
+    paths = segments(filename)
+    if os.path.exists(filename):
+        paths.append(filename)
+    return [LogIndex(path) for path in paths if os.path.exists(index_path(path))]
+
+
+def main(argv=None):
+    """Print the command output from the session log or list the indexed commands."""
+    parser = argparse.ArgumentParser(prog="python -m condoor.logindex",
+                                     description="Print the command output from the condoor session log.")
+    parser.add_argument("log", help="The session log file. The rotated segments are searched too.")
+    parser.add_argument("command", nargs="?", help="The command to print the output of.")
+    parser.add_argument("-d", "--device", help="Only the command sent to the device hostname.")
+    parser.add_argument("-l", "--list", action="store_true", help="List the indexed commands.")
+    parser.add_argument("--last", action="store_true", help="Print only the last output of the command.")
+    args = parser.parse_args(argv)
+    if not args.list and args.command is None:
+        parser.error("the command or --list is required")
+
+    indexes = open_indexes(args.log)
+    try:
+        if args.list:
+            for index in indexes:
+                for entry in index.entries:
+                    if args.device is None or entry.device == args.device:
+                        sys.stdout.write("{} {:.3f}s {} {} {}\n".format(
+                            entry.device, entry.end_time - entry.start_time, entry.outcome, index.filename,
+                            entry.command))
+            return 0
+
+        found = [(index, entry) for index in indexes for entry in index.find(args.command, args.device)]
+        if not found:
+            sys.stderr.write("Command not found: {}\n".format(args.command))
+            return 1
+        for index, entry in found[-1:] if args.last else found:
+            sys.stdout.write(index.output(entry))
+            sys.stdout.write("\n")
+        return 0
+    finally:
+        for index in indexes:
+            index.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
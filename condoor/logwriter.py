@@ -0,0 +1,246 @@
+"""Provides the single thread writing the log files of all the connections in the process."""
+
+import atexit
+import os
+import sys
+import threading
+from collections import defaultdict
+from Queue import Queue, Empty, Full
+
+from condoor.utils import FilteredFile
+
+_OPEN, _WRITE, _CLOSE, _SYNC, _STOP, _INDEX_START, _INDEX_END, _SYNC_FILE = range(8)
+
+
+class QueuedFile(object):
+    """The file like object handing the written text to the writer thread.
+
+    The ``write`` method never blocks. The text is dropped and counted by the writer if its queue is full.
+    """
+
+    def __init__(self, writer, filename, index=False):
+        """Initialize the QueuedFile object."""
+        self.writer = writer
+        self.name = filename
+        self.index = index
+        self.closed = False
+
+    def write(self, text):
+        """Queue the text to be written."""
+        if not self.closed:
+            self.writer.put(_WRITE, self.name, (self, text))
+
+    def flush(self):
+        """Do nothing. The writer thread writes the files periodically."""
+        pass
+
+    def sync(self):
+        """Queue writing the text including the incomplete line."""
+        if not self.closed:
+            self.writer.put(_SYNC_FILE, self.name, self)
+
+    def index_start(self, entry):
+        """Queue storing the command output start offset in the index entry."""
+        if self.index and not self.closed:
+            self.writer.put(_INDEX_START, self.name, (self, entry))
+
+    def index_end(self, entry):
+        """Queue storing the command output end offset in the index entry and writing the entry."""
+        if self.index and not self.closed:
+            self.writer.put(_INDEX_END, self.name, (self, entry))
+
+    def close(self):
+        """Queue closing the file. The text queued before is written."""
+        if not self.closed:
+            self.closed = True
+            self.writer.put(_CLOSE, self.name, self, block=True)
+
+
+class LogWriter(object):
+    """The writer thread with the queue of the log records.
+
+    The file is opened by the writer thread on the first :meth:`open` and closed after the last
+    :class:`QueuedFile` is closed, so the connections logging to the same file share it and their records do
+    not interleave within the written chunk. The incomplete line is kept per :class:`QueuedFile`, so only the
+    complete lines of the connections sharing the file are mixed and redacted, and the command output range in
+    the index of the shared file may include the lines of the other connections. The redaction and writing
+    are done by the writer thread, and the files are flushed every flush_interval seconds if nothing is written.
+    """
+
+    def __init__(self, max_size=10000, flush_interval=1.0):
+        """Initialize the LogWriter object."""
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue = Queue(self.max_size)
+        self._files = {}
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+        self.dropped_per_file = defaultdict(int)
+
+    def open(self, filename, **kwargs):
+        """Return the :class:`QueuedFile` object. The kwargs are passed to :class:`condoor.utils.FilteredFile`."""
+        self.start()
+        self.put(_OPEN, filename, kwargs, block=True)
+        return QueuedFile(self, filename, index=kwargs.get('index', False))
+
+    def start(self):
+        """Start the writer thread if not running, i.e. in the forked process."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="condoor-log-writer")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def put(self, op, filename, data=None, block=False):
+        """Queue the operation. The write is dropped and counted if the queue is full."""
+        try:
+            self._queue.put((op, filename, data), block=block, timeout=self.flush_interval if block else None)
+        except Full:
+            with self._lock:
+                self.dropped += 1
+                self.dropped_per_file[filename] += 1
+
+    def sync(self, timeout=10):
+        """Wait until the records queued before are written and the files flushed. Return True if done."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self.put(_SYNC, None, done, block=True)
+        done.wait(timeout)
+        return done.is_set()
+
+    def stop(self, timeout=10):
+        """Write the queued records, close the files and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self.put(_STOP, None, block=True)
+            self._thread.join(timeout)
+
+    def stats(self):
+        """Return the dictionary with the written and dropped record counters."""
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'dropped_per_file': dict(self.dropped_per_file),
+            }
+
+    def _run(self):
+        while True:
+            try:
+                op, filename, data = self._queue.get(timeout=self.flush_interval)
+            except Empty:
+                self._flush()
+                continue
+            if op == _STOP:
+                for entry in self._files.values():
+                    self._close(entry)
+                self._files.clear()
+                return
+            try:
+                self._handle(op, filename, data)
+            except (IOError, OSError, ValueError) as err:
+                sys.stderr.write("Log writer error: {}: {}\n".format(filename, err))
+
+    def _handle(self, op, filename, data):
+        if op == _WRITE:
+            entry = self._files.get(filename)
+            if entry is not None and entry[0] is not None:
+                self._write_lines(entry, *data)
+                self.written += 1
+        elif op == _OPEN:
+            entry = self._files.get(filename)
+            if entry is None:
+                try:
+                    log_file = FilteredFile(filename, **data)
+                except IOError:
+                    sys.stderr.write("Unable to create log file: {}\n".format(filename))
+                    log_file = None
+                # the file object, the number of the QueuedFile objects and their incomplete lines
+                entry = self._files[filename] = [log_file, 0, {}]
+            entry[1] += 1
+        elif op == _CLOSE:
+            entry = self._files.get(filename)
+            if entry is not None:
+                if entry[0] is not None:
+                    self._write_incomplete_line(entry, data)
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    self._close(entry)
+                    del self._files[filename]
+        elif op in (_INDEX_START, _INDEX_END):
+            entry = self._files.get(filename)
+            if entry is not None and entry[0] is not None:
+                source, index_entry = data
+                self._write_incomplete_line(entry, source)
+                if op == _INDEX_START:
+                    entry[0].index_start(index_entry)
+                else:
+                    entry[0].index_end(index_entry)
+        elif op == _SYNC_FILE:
+            entry = self._files.get(filename)
+            if entry is not None and entry[0] is not None:
+                self._write_incomplete_line(entry, data)
+        elif op == _SYNC:
+            self._flush()
+            data.set()
+
+    @staticmethod
+    def _write_lines(entry, source, text):
+        """Write the complete lines and keep the incomplete line of the source."""
+        log_file, _, incomplete_lines = entry
+        text = incomplete_lines.pop(source, "") + text
+        index = text.rfind('\n')
+        if index < len(text) - 1:
+            incomplete_lines[source] = text[index + 1:]
+        if index >= 0:
+            log_file.write(text[:index + 1])
+
+    @staticmethod
+    def _write_incomplete_line(entry, source):
+        """Write the incomplete line of the source, i.e. the prompt, and flush the file."""
+        log_file, _, incomplete_lines = entry
+        text = incomplete_lines.pop(source, "")
+        if text:
+            log_file.write(text)
+        log_file.sync()
+
+    def _flush(self):
+        for log_file, _, _ in self._files.values():
+            if log_file is not None:
+                try:
+                    log_file.flush()
+                except (IOError, OSError, ValueError):
+                    pass
+
+    def _close(self, entry):
+        log_file, _, incomplete_lines = entry
+        if log_file is not None:
+            try:
+                for source in list(incomplete_lines):
+                    self._write_incomplete_line(entry, source)
+                log_file.close()
+            except (IOError, OSError, ValueError):
+                pass
+
+
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+def get_log_writer(max_size=10000, flush_interval=1.0):
+    """Return the process wide :class:`LogWriter` object."""
+    global _log_writer  # pylint: disable=global-statement
+    with _log_writer_lock:
+        if _log_writer is None:
+            _log_writer = LogWriter(max_size, flush_interval)
+            atexit.register(_log_writer.stop)
+    return _log_writer
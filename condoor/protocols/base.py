@@ -14,11 +14,16 @@ class Protocol(object):
         self.port = self.device.node_info.port
         self.password = self.device.node_info.password
         self.username = self.device.node_info.username
+        self.transport = self.device.node_info.transport
 
         self.last_pattern = None
         self.matched_string = None
         self.log = device.chain.connection.log
 
+    def get_session(self):
+        """Return the in-process session object or None if the protocol command must be spawned."""
+        return None
+
     def connect(self, driver):
         """Connect using specific protocol."""
         raise NotImplementedError("Connection method not implemented")
@@ -1,6 +1,9 @@
 """Provides SSH driver class."""
 
 from functools import partial
+import hashlib
+import os
+import socket
 import pexpect
 
 from condoor.fsm import FSM, action
@@ -11,6 +14,7 @@ from condoor.actions import a_send_password, a_authentication_error, a_send, a_u
 
 from condoor.exceptions import ConnectionError, ConnectionTimeoutError, CommandSyntaxError
 from condoor.config import CONF
+from condoor.transport import SSHSession
 
 
 MODULUS_TOO_SMALL = "modulus too small"
@@ -28,6 +32,9 @@ class SSH(Protocol):
     def __init__(self, device):
         """Initialize SSH object."""
         super(SSH, self).__init__(device)
+        if self.transport is None:
+            self.transport = _C['transport']
+        self.control_path = None
 
     def get_command(self, version=2):
         """Return the SSH protocol specific command to connect."""
@@ -39,6 +46,12 @@ class SSH(Protocol):
         except KeyError:
             options_str = ""
 
+        if version == 2:
+            self.control_path = self._get_control_path()
+            if self.control_path:
+                options_str += "-o ControlMaster=auto -o ControlPath={} -o ControlPersist={} ".format(
+                    self.control_path, _C['control_master']['persist'])
+
         if self.username:
             # Not supported on SunOS
             # "-o ConnectTimeout={}
@@ -51,8 +64,69 @@ class SSH(Protocol):
                       "-p {} {}".format(options_str, version, self.port, self.hostname)
         return command
 
+    def get_session(self):
+        """Return the native SSH session if configured, otherwise None and the ssh command is spawned."""
+        if self.transport != 'native':
+            return None
+        self.log("Opening native SSH session to {}:{}".format(self.hostname, self.port))
+        return SSHSession(self.hostname, self.port, self.username, self._acquire_password(),
+                          connect_timeout=_C['connect_timeout'], idle_timeout=_C['idle_timeout'])
+
+    def _get_control_path(self):
+        """Return the ControlMaster socket path for the first hop or None if the multiplexing is not used.
+
+        The socket left by the master which is not running anymore is removed, so the next ssh client becomes
+        the new master.
+        """
+        config = _C['control_master']
+        if not config['enabled'] or self.transport == 'native' or self.device.chain.devices.index(self.device) > 0:
+            return None
+
+        directory = os.path.expanduser(config['directory'])
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory, 0o700)
+        except OSError as err:
+            self.log("Unable to create the ControlMaster directory: {}".format(err))
+            return None
+
+        # the socket path length is limited, so the hash is used instead of user@host:port
+        name = hashlib.sha1("{}@{}:{}".format(self.username, self.hostname, self.port)).hexdigest()[:16]
+        control_path = os.path.join(directory, name)
+        if os.path.exists(control_path):
+            if _is_master_running(control_path):
+                self.log("Reusing the SSH ControlMaster: {}".format(control_path))
+            elif not self._remove_control_path(control_path):
+                return None
+        return control_path
+
+    def _remove_control_path(self, control_path):
+        self.log("Removing the stale SSH ControlMaster socket: {}".format(control_path))
+        try:
+            os.unlink(control_path)
+        except OSError as err:
+            if os.path.exists(control_path):
+                self.log("Unable to remove the socket, multiplexing disabled: {}".format(err))
+                return False
+        return True
+
     def connect(self, driver):
         """Connect using the SSH protocol specific FSM."""
+        try:
+            result = self._connect(driver)
+        except ConnectionError:
+            self._check_control_master()
+            raise
+        if not result:
+            self._check_control_master()
+        return result
+
+    def _check_control_master(self):
+        # if the master died the socket is removed and the next attempt starts the new master
+        if self.control_path and os.path.exists(self.control_path) and not _is_master_running(self.control_path):
+            self._remove_control_path(self.control_path)
+
+    def _connect(self, driver):
         #                      0                    1                 2
         events = [driver.password_re, self.device.prompt_re, driver.unable_to_connect_re,
                   #   3          4              5               6                   7
@@ -117,3 +191,15 @@ class SSH(Protocol):
         command = self.get_command(version=1)
         ctx.spawn_session(command)
         return True
+
+
+def _is_master_running(control_path):
+    """Return True if the ControlMaster accepts the connections on the control socket."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(control_path)
+        return True
+    except socket.error:
+        return False
+    finally:
+        sock.close()
@@ -12,6 +12,7 @@ from condoor.actions import a_send, a_send_password, a_authentication_error, a_u
 
 from condoor.exceptions import ConnectionError, ConnectionTimeoutError, CommandSyntaxError
 from condoor.config import CONF
+from condoor.transport import TelnetSession
 
 
 # Telnet connection initiated
@@ -29,11 +30,23 @@ class Telnet(Protocol):
     def __init__(self, device):
         """Initialize the Telnet object."""
         super(Telnet, self).__init__(device)
+        if self.transport is None:
+            self.transport = _C['transport']
 
     def get_command(self):
         """Return the Telnet protocol specific command to connect."""
         return "telnet {} {}".format(self.hostname, self.port)
 
+    def get_session(self):
+        """Return the native Telnet session if configured, otherwise None and the telnet command is spawned."""
+        if self.transport != 'native':
+            return None
+        self.log("Opening native Telnet session to {}:{}".format(self.hostname, self.port))
+        session = TelnetSession(self.hostname, self.port, connect_timeout=_C['connect_timeout'])
+        # the TCP connection is already established, the same as the telnet client escape character banner
+        self.last_pattern = ESCAPE_CHAR
+        return session
+
     def connect(self, driver):
         """Connect using the Telnet protocol specific FSM."""
         #              0            1                              2                      3
@@ -141,7 +154,7 @@ class TelnetConsole(Telnet):
         ]
         self.log("EXPECTED_PROMPT={}".format(pattern_to_str(self.device.prompt_re)))
         fsm = FSM("TELNET-CONNECT-CONSOLE", self.device, events, transitions, timeout=_C['connect_timeout'],
-                  init_pattern=None)
+                  init_pattern=self.last_pattern)
         return fsm.run()
 
     def disconnect(self, driver):
@@ -0,0 +1,83 @@
+"""Provides the retry policies deciding the delay between the failed connection attempts."""
+
+import random
+import sys
+
+
+class RetryPolicy(object):
+    """The base class for the retry policies.
+
+    The ``delay`` method returns the time in seconds to wait before the next connection attempt after the
+    given number of consecutive failed attempts.
+    """
+
+    def __init__(self, initial_delay=1, max_delay=30, factor=2, jitter=0):
+        """Initialize the RetryPolicy object.
+
+        Args:
+            initial_delay (float): The delay in seconds after the first failed attempt.
+            max_delay (float): The maximum delay in seconds.
+            factor (float): The multiplier applied to the delay after each failed attempt.
+            jitter (float): The fraction of the delay randomly subtracted, so the many connections to the same
+                devices do not retry in lockstep. 0 means no jitter.
+        """
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+
+    def delay(self, failures):
+        """Return the delay in seconds before the next attempt after the number of failed attempts."""
+        raise NotImplementedError("Retry policy delay not implemented")
+
+    def _jittered(self, delay):
+        return delay * (1 - self.jitter * random.random())
+
+
+class FixedDelay(RetryPolicy):
+    """The policy waiting max_delay seconds after each failed attempt."""
+
+    def delay(self, failures):
+        """Return the delay in seconds before the next attempt after the number of failed attempts."""
+        return self._jittered(self.max_delay)
+
+
+class ExponentialBackoff(RetryPolicy):
+    """The policy multiplying the delay by the factor after each failed attempt up to max_delay."""
+
+    def delay(self, failures):
+        """Return the delay in seconds before the next attempt after the number of failed attempts."""
+        delay = self.initial_delay * self.factor ** max(0, failures - 1)
+        return self._jittered(min(delay, self.max_delay))
+
+
+_POLICIES = {
+    'fixed': FixedDelay,
+    'exponential': ExponentialBackoff,
+}
+
+
+def make_retry_policy(policy, initial_delay=1, max_delay=30, factor=2, jitter=0):
+    """Return the retry policy object.
+
+    Args:
+        policy (str): The policy name: 'exponential' or 'fixed', or the dotted path to the
+            :class:`condoor.retry.RetryPolicy` derived class, i.e. 'mypackage.mymodule.MyPolicy'.
+        initial_delay (float): The delay in seconds after the first failed attempt.
+        max_delay (float): The maximum delay in seconds.
+        factor (float): The multiplier applied to the delay after each failed attempt.
+        jitter (float): The fraction of the delay randomly subtracted.
+
+    Returns:
+        The :class:`condoor.retry.RetryPolicy` object.
+    """
+    policy_class = _POLICIES.get(policy)
+    if policy_class is None:
+        module_str, _, class_name = policy.rpartition('.')
+        try:
+            __import__(module_str)
+            policy_class = getattr(sys.modules[module_str], class_name)
+        except (ImportError, AttributeError, ValueError):
+            raise ValueError("Unknown retry policy: {}".format(policy))
+
+    return policy_class(initial_delay=initial_delay, max_delay=max_delay, factor=factor, jitter=jitter)
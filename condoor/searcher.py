@@ -0,0 +1,137 @@
+"""Provides the Searcher class matching all the FSM events in a single regular expression pass."""
+
+import re
+
+from pexpect import EOF, TIMEOUT
+
+# the patterns using back references, conditional group references or global inline flags can't be safely
+# joined with other patterns
+_UNMERGEABLE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|\(\?[iLmsux]+\)")
+
+
+class _Bucket(object):
+    """The set of patterns joined into one alternation."""
+
+    def __init__(self, flags):
+        """Initialize the bucket object for patterns sharing the same flags."""
+        self.flags = flags
+        self.names = set()
+        self.members = []
+        self.regex = None
+        self.group2index = {}
+
+    def accepts(self, pattern):
+        """Return True if pattern can be added to the bucket."""
+        return pattern.flags == self.flags and not self.names.intersection(pattern.groupindex)
+
+    def add(self, index, pattern):
+        """Add the pattern with its event index."""
+        self.names.update(pattern.groupindex)
+        self.members.append((index, pattern))
+
+    def compile(self):
+        """Compile the alternation of all the member patterns."""
+        alternatives = ["(?P<_e{}>{})".format(index, pattern.pattern) for index, pattern in self.members]
+        self.regex = re.compile("|".join(alternatives), self.flags)
+        self.group2index = {self.regex.groupindex["_e{}".format(index)]: index for index, _ in self.members}
+
+
+class Searcher(object):
+    """Search for the FSM events with one regular expression pass per read.
+
+    This is the drop-in replacement for the pexpect ``searcher_re`` class. All the patterns sharing the same
+    flags are joined into one alternation of named groups. The patterns which can't be merged (back references,
+    inline flags, colliding group names) are searched separately. The result is the same as for ``searcher_re``,
+    the earliest match wins and the lower event index wins if two events match at the same position.
+    """
+
+    def __init__(self, patterns):
+        """Initialize the Searcher object.
+
+        Args:
+            patterns (list): List of strings, compiled regular expressions, pexpect.EOF or pexpect.TIMEOUT.
+        """
+        self.eof_index = -1
+        self.timeout_index = -1
+        self.start = None
+        self.end = None
+        self.match = None
+
+        self._buckets = []
+        self._singles = []
+        self._patterns = {}
+
+        for index, pattern in enumerate(patterns):
+            if pattern is EOF:
+                self.eof_index = index
+                continue
+            if pattern is TIMEOUT:
+                self.timeout_index = index
+                continue
+            if isinstance(pattern, basestring):
+                # the same way as pexpect compiles the string patterns
+                pattern = re.compile(pattern, re.DOTALL)
+            self._patterns[index] = pattern
+
+            if _UNMERGEABLE_RE.search(pattern.pattern):
+                self._singles.append((index, pattern))
+                continue
+
+            for bucket in self._buckets:
+                if bucket.accepts(pattern):
+                    bucket.add(index, pattern)
+                    break
+            else:
+                bucket = _Bucket(pattern.flags)
+                bucket.add(index, pattern)
+                self._buckets.append(bucket)
+
+        for bucket in list(self._buckets):
+            if len(bucket.members) == 1:
+                self._buckets.remove(bucket)
+                self._singles.extend(bucket.members)
+                continue
+            try:
+                bucket.compile()
+            except (re.error, AssertionError):
+                # i.e. too many groups
+                self._buckets.remove(bucket)
+                self._singles.extend(bucket.members)
+
+    def __str__(self):
+        """Return the string representing the searcher."""
+        return "Searcher: {} combined, {} single pattern(s)".format(len(self._buckets), len(self._singles))
+
+    def search(self, buffer, freshlen, searchwindowsize=None):
+        """Search the buffer for the first occurrence of any of the patterns.
+
+        The arguments and the return value follow the pexpect ``searcher_re.search`` convention.
+        """
+        searchstart = 0 if searchwindowsize is None else max(0, len(buffer) - searchwindowsize)
+        best = None
+        for bucket in self._buckets:
+            match = bucket.regex.search(buffer, searchstart)
+            if match is not None:
+                candidate = (match.start(), bucket.group2index[match.lastindex])
+                if best is None or candidate < best[0]:
+                    best = (candidate, None)
+
+        for index, pattern in self._singles:
+            match = pattern.search(buffer, searchstart)
+            if match is not None:
+                candidate = (match.start(), index)
+                if best is None or candidate < best[0]:
+                    best = (candidate, match)
+
+        if best is None:
+            return -1
+
+        (start, index), match = best
+        if match is None:
+            # rematch the winning pattern to provide its own groups to the actions
+            match = self._patterns[index].match(buffer, start)
+
+        self.start = start
+        self.match = match
+        self.end = match.end()
+        return index
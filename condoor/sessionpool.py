@@ -0,0 +1,92 @@
+"""Provides the process wide pool of the authenticated jumphost sessions."""
+
+import atexit
+import threading
+import time
+
+
+class _PooledSession(object):
+    """The idle session left at the last jumphost prompt."""
+
+    def __init__(self, session, jumphosts):
+        """Initialize the pooled session object.
+
+        Args:
+            session (object): The pexpect spawn compatible session object.
+            jumphosts (list): The list of (prompt, device_info) tuples for every jumphost in the path.
+        """
+        self.session = session
+        self.jumphosts = jumphosts
+        self.released = time.time()
+
+    def close(self):
+        """Close the session."""
+        try:
+            self.session.close(force=True)
+        except OSError:
+            pass
+
+
+class SessionPool(object):
+    """Pool of the sessions connected to the jumphosts.
+
+    The sessions are keyed by the jumphost path prefix of the chain. Every session is checked out exclusively
+    by one connection and returned to the pool on disconnect. The idle sessions are closed after idle_timeout
+    seconds or if their process is not alive anymore.
+    """
+
+    def __init__(self):
+        """Initialize the SessionPool object."""
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def checkout(self, key, idle_timeout):
+        """Return the most recently released idle session for the key or None."""
+        with self._lock:
+            self._evict(idle_timeout)
+            sessions = self._sessions.get(key)
+            if sessions:
+                return sessions.pop()
+        return None
+
+    def checkin(self, key, session, jumphosts, max_idle):
+        """Return the session to the pool. The oldest idle session is closed if max_idle is exceeded."""
+        closed = []
+        with self._lock:
+            sessions = self._sessions.setdefault(key, [])
+            sessions.append(_PooledSession(session, jumphosts))
+            while len(sessions) > max_idle:
+                closed.append(sessions.pop(0))
+        for pooled in closed:
+            pooled.close()
+
+    def clear(self):
+        """Close all the idle sessions."""
+        with self._lock:
+            sessions = [pooled for pooled_list in self._sessions.values() for pooled in pooled_list]
+            self._sessions.clear()
+        for pooled in sessions:
+            pooled.close()
+
+    def __len__(self):
+        """Return the number of idle sessions."""
+        with self._lock:
+            return sum(len(sessions) for sessions in self._sessions.values())
+
+    def _evict(self, idle_timeout):
+        now = time.time()
+        for key, sessions in self._sessions.items():
+            alive = []
+            for pooled in sessions:
+                if now - pooled.released < idle_timeout and pooled.session.isalive():
+                    alive.append(pooled)
+                else:
+                    pooled.close()
+            if alive:
+                self._sessions[key] = alive
+            else:
+                del self._sessions[key]
+
+
+session_pool = SessionPool()
+atexit.register(session_pool.clear)
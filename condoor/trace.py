@@ -0,0 +1,167 @@
+"""Provides the structured FSM transition tracing and the per-state latency histograms."""
+
+import json
+import threading
+from bisect import bisect_left
+from collections import namedtuple, deque
+
+#: The single FSM transition record passed to the trace sink.
+#:
+#: - **fsm** (str): The FSM name, i.e. WAIT-4-STRING.
+#: - **device** (str): The device hostname.
+#: - **state** (int): The FSM state in which the event occurred.
+#: - **event** (int): The index of the event in the FSM events list.
+#: - **pattern** (str): The event pattern string.
+#: - **next_state** (int): The FSM state after the transition.
+#: - **response_time** (float): Seconds spent waiting for the event.
+#: - **bytes** (int): Number of characters consumed from the session by the event.
+#: - **action_time** (float): Seconds spent in the transition action.
+#: - **timestamp** (float): The time when the event occurred.
+Transition = namedtuple('Transition', 'fsm device state event pattern next_state response_time bytes action_time '
+                                      'timestamp')
+
+# the histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 60, 120, 300, float('inf'))
+
+
+class TraceSink(object):
+    """The base class for the FSM transition trace sinks.
+
+    The ``emit`` method is called by the FSM after every transition with the :data:`Transition` record. It is
+    called from the thread doing the device I/O, so it must not block.
+    """
+
+    def emit(self, transition):
+        """Consume the transition record."""
+        raise NotImplementedError("Trace sink emit not implemented")
+
+    def close(self):
+        """Release the sink resources."""
+        pass
+
+
+class MemorySink(TraceSink):
+    """The sink keeping the last maxlen transition records in memory."""
+
+    def __init__(self, maxlen=10000):
+        """Initialize the MemorySink object."""
+        self.transitions = deque(maxlen=maxlen)
+
+    def emit(self, transition):
+        """Store the transition record."""
+        self.transitions.append(transition)
+
+
+class JSONLinesSink(TraceSink):
+    """The sink writing the transition records to the file as the JSON objects, one per line."""
+
+    def __init__(self, filename):
+        """Initialize the JSONLinesSink object and open the file for appending."""
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._fd = open(filename, 'a')
+
+    def emit(self, transition):
+        """Write the transition record."""
+        line = json.dumps(transition._asdict()) + '\n'
+        with self._lock:
+            self._fd.write(line)
+
+    def close(self):
+        """Close the file."""
+        with self._lock:
+            self._fd.close()
+
+
+class LatencyHistogram(object):
+    """The histogram of the response times with the fixed buckets defined by :data:`BUCKETS`."""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        """Initialize the empty LatencyHistogram object."""
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        """Add the response time in seconds to the histogram."""
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the other histogram counts to this histogram."""
+        self.counts = [mine + others for mine, others in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        """Return the mean response time."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """Return the upper bound of the bucket containing the percentile. The max value for the last bucket."""
+        threshold = self.count * percent / 100.0
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            if count and cumulative >= threshold:
+                return min(bound, self.max)
+        return self.max
+
+
+class FSMStats(object):
+    """The response time histograms aggregated per FSM name and state."""
+
+    def __init__(self):
+        """Initialize the empty FSMStats object."""
+        self._lock = threading.Lock()
+        self.histograms = {}
+
+    def record(self, fsm, state, response_time):
+        """Add the response time of the FSM state to the histogram."""
+        key = (fsm, state)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(response_time)
+
+    def merge(self, other):
+        """Add the other FSMStats histograms, i.e. to aggregate the stats of many connections."""
+        with self._lock:
+            for key, others in other.histograms.items():
+                self.histograms.setdefault(key, LatencyHistogram()).merge(others)
+
+    def histogram(self, fsm, state):
+        """Return the histogram of the FSM state or None if not recorded."""
+        return self.histograms.get((fsm, state))
+
+    def summary(self):
+        """Return the list of the per FSM state statistics dictionaries sorted by the total time descending."""
+        with self._lock:
+            items = list(self.histograms.items())
+        result = [{
+            'fsm': fsm,
+            'state': state,
+            'count': histogram.count,
+            'total': histogram.total,
+            'mean': histogram.mean,
+            'max': histogram.max,
+            'p50': histogram.percentile(50),
+            'p90': histogram.percentile(90),
+            'p99': histogram.percentile(99),
+        } for (fsm, state), histogram in items]
+        result.sort(key=lambda item: item['total'], reverse=True)
+        return result
+
+    def clear(self):
+        """Remove all the histograms."""
+        with self._lock:
+            self.histograms.clear()
@@ -0,0 +1,380 @@
+"""Provides the in-process sessions implementing the pexpect spawn interface used by the Controller."""
+
+import atexit
+import select
+import socket
+import struct
+import telnetlib
+import threading
+import time
+
+from pexpect import EOF, TIMEOUT
+from pexpect.spawnbase import SpawnBase
+
+from condoor.exceptions import ConnectionError, ConnectionAuthenticationError, ConnectionTimeoutError
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+
+_CONTROL_CHARS = {'@': 0, '`': 0, '[': 27, '{': 27, '\\': 28, '|': 28, ']': 29, '}': 29, '^': 30, '~': 30, '_': 31,
+                  '?': 127}
+
+
+class SocketSession(SpawnBase):
+    """The pexpect compatible session over the socket like object.
+
+    The derived classes provide the ``_recv``, ``_send``, ``_pending`` and ``_alive`` methods. The ``_recv``
+    method returns an empty string on EOF and None if no payload data was received.
+    """
+
+    def __init__(self, sock, timeout=30, maxread=65536, searchwindowsize=None):
+        """Initialize the SocketSession object."""
+        super(SocketSession, self).__init__(timeout=timeout, maxread=maxread, searchwindowsize=searchwindowsize)
+        self.sock = sock
+        self.child_fd = sock.fileno()
+        self.closed = False
+        self.terminated = False
+        self.rows, self.cols = 24, 80
+
+    def read_nonblocking(self, size=1, timeout=-1):
+        """Read at most size characters from the session or raise TIMEOUT if nothing received within timeout."""
+        if self.closed:
+            raise ValueError("I/O operation on closed session.")
+        if timeout == -1:
+            timeout = self.timeout
+        end_time = None if timeout is None else time.time() + timeout
+
+        while True:
+            if not self._pending():
+                remaining = None if end_time is None else max(0, end_time - time.time())
+                try:
+                    readable, _, _ = select.select([self.sock], [], [], remaining)
+                except (select.error, socket.error, ValueError):
+                    readable = [self.sock]
+                if not readable:
+                    raise TIMEOUT("Timeout exceeded.")
+
+            try:
+                data = self._recv(size)
+            except (socket.error, EOFError):
+                data = ''
+
+            # None means only the protocol data received, i.e. the telnet option negotiation
+            if data is not None:
+                break
+
+        if not data:
+            self.flag_eof = True
+            raise EOF("End Of File (EOF). Session closed.")
+
+        self._log(data, 'read')
+        return data
+
+    def send(self, s):
+        """Send the string to the remote end."""
+        if self.delaybeforesend is not None:
+            time.sleep(self.delaybeforesend)
+        s = self._coerce_send_string(s)
+        self._log(s, 'send')
+        try:
+            self._send(s)
+        except (socket.error, EOFError) as err:
+            raise OSError(str(err))
+        return len(s)
+
+    def sendline(self, s=''):
+        """Send the string followed by the line separator."""
+        return self.send(self._coerce_send_string(s) + self.linesep)
+
+    def sendcontrol(self, char):
+        """Send the control character i.e. sendcontrol('c')."""
+        char = char.lower()
+        code = ord(char)
+        if 97 <= code <= 122:
+            code = code - ord('a') + 1
+        elif char in _CONTROL_CHARS:
+            code = _CONTROL_CHARS[char]
+        else:
+            return 0
+        return self.send(chr(code))
+
+    def isalive(self):
+        """Return True if the session is alive."""
+        return not self.closed and self._alive()
+
+    def close(self, force=True):
+        """Close the session."""
+        if not self.closed:
+            try:
+                self.sock.close()
+            except (socket.error, EOFError):
+                pass
+            self.closed = True
+            self.terminated = True
+
+    def terminate(self, force=False):
+        """Shut down the connection without closing the session.
+
+        This can be called from the other thread. The thread reading the session gets EOF and closes it.
+        """
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except (socket.error, EOFError):
+            pass
+        return True
+
+    def wait(self):
+        """Return immediately as there is no child process to wait for."""
+        return 0
+
+    def getwinsize(self):
+        """Return the terminal window size (rows, cols)."""
+        return self.rows, self.cols
+
+    def setwinsize(self, rows, cols):
+        """Set the terminal window size."""
+        self.rows, self.cols = rows, cols
+
+    def setecho(self, state):
+        """Do nothing. The echo is controlled by the remote end."""
+        pass
+
+    def waitnoecho(self, timeout=-1):
+        """Return True. There is no local terminal and the remote end controls the echo."""
+        return True
+
+    def _recv(self, size):
+        raise NotImplementedError("Receive method not implemented")
+
+    def _send(self, data):
+        raise NotImplementedError("Send method not implemented")
+
+    def _pending(self):
+        return False
+
+    def _alive(self):
+        return True
+
+
+class _SSHClientPool(object):
+    """Authenticated SSH clients shared by the sessions to the same host."""
+
+    def __init__(self, idle_timeout):
+        """Initialize the pool object."""
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    def acquire(self, hostname, port, username, password, timeout):
+        """Return the authenticated SSH client, reusing the already connected one if possible."""
+        key = (hostname, port, username, password)
+        with self._lock:
+            self._evict()
+            entry = self._clients.get(key)
+            if entry is not None and entry['client'].get_transport().is_active():
+                entry['channels'] += 1
+                return entry['client'], True
+
+        client = paramiko.SSHClient()
+        # the same as StrictHostKeyChecking=no and UserKnownHostsFile=/dev/null for the ssh command
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(hostname, port=port, username=username, password=password, timeout=timeout,
+                       allow_agent=password is None, look_for_keys=password is None)
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and entry['client'].get_transport().is_active():
+                # the other thread connected in the meantime, its client may already carry the channels
+                entry['channels'] += 1
+                reused = entry['client']
+            else:
+                reused = None
+                if entry is not None:
+                    entry['client'].close()
+                self._clients[key] = {'client': client, 'channels': 1, 'idle_since': None}
+
+        if reused is not None:
+            client.close()
+            return reused, True
+        return client, False
+
+    def release(self, client):
+        """Release the client after the session channel is closed."""
+        with self._lock:
+            for entry in self._clients.values():
+                if entry['client'] is client:
+                    entry['channels'] -= 1
+                    if entry['channels'] == 0:
+                        entry['idle_since'] = time.time()
+                    break
+
+    def close(self):
+        """Close all the clients."""
+        with self._lock:
+            for entry in self._clients.values():
+                entry['client'].close()
+            self._clients.clear()
+
+    def _evict(self):
+        now = time.time()
+        for key, entry in self._clients.items():
+            if not entry['client'].get_transport() or not entry['client'].get_transport().is_active() or \
+                    (entry['channels'] == 0 and now - entry['idle_since'] > self.idle_timeout):
+                entry['client'].close()
+                del self._clients[key]
+
+
+_ssh_client_pool = None
+_ssh_client_pool_lock = threading.Lock()
+
+
+def _get_ssh_client_pool(idle_timeout):
+    global _ssh_client_pool  # pylint: disable=global-statement
+    with _ssh_client_pool_lock:
+        if _ssh_client_pool is None:
+            _ssh_client_pool = _SSHClientPool(idle_timeout)
+            atexit.register(_ssh_client_pool.close)
+    return _ssh_client_pool
+
+
+class SSHSession(SocketSession):
+    """The in-process SSH session based on paramiko.
+
+    The authenticated SSH connection is kept in the process wide pool and the next sessions to the same host
+    open a new channel on the existing connection instead of repeating the key exchange and authentication.
+    """
+
+    def __init__(self, hostname, port, username, password, connect_timeout=30, idle_timeout=300,
+                 rows=512, cols=240, term='vt220'):
+        """Initialize the SSHSession object, connect and open the interactive shell channel."""
+        if paramiko is None:
+            raise ConnectionError("The native SSH transport requires the paramiko package", hostname)
+
+        self._pool = _get_ssh_client_pool(idle_timeout)
+        try:
+            self._client, self.reused = self._pool.acquire(hostname, port, username, password, connect_timeout)
+        except paramiko.AuthenticationException:
+            raise ConnectionAuthenticationError("Authentication failed", hostname)
+        except socket.timeout:
+            raise ConnectionTimeoutError("Connection timeout", hostname)
+        except (socket.error, paramiko.SSHException) as err:
+            raise ConnectionError("Unable to connect: {}".format(err), hostname)
+
+        try:
+            channel = self._client.get_transport().open_session(timeout=connect_timeout)
+            channel.get_pty(term=term, width=cols, height=rows)
+            channel.invoke_shell()
+        except (socket.error, paramiko.SSHException) as err:
+            self._pool.release(self._client)
+            raise ConnectionError("Unable to open the session channel: {}".format(err), hostname)
+
+        super(SSHSession, self).__init__(channel)
+        self.rows, self.cols = rows, cols
+
+    def setwinsize(self, rows, cols):
+        """Set the remote terminal window size."""
+        self.sock.resize_pty(width=cols, height=rows)
+        super(SSHSession, self).setwinsize(rows, cols)
+
+    def terminate(self, force=False):
+        """Close the channel. The SSH connection is returned to the pool when the session is closed."""
+        self.sock.close()
+        return True
+
+    def close(self, force=True):
+        """Close the channel and return the SSH connection to the pool."""
+        if not self.closed:
+            super(SSHSession, self).close(force)
+            self._pool.release(self._client)
+
+    def _recv(self, size):
+        return self.sock.recv(size)
+
+    def _send(self, data):
+        self.sock.sendall(data)
+
+    def _pending(self):
+        return self.sock.recv_ready()
+
+    def _alive(self):
+        transport = self.sock.get_transport()
+        return not self.sock.closed and transport is not None and transport.is_active()
+
+
+class TelnetSession(SocketSession):
+    """The in-process Telnet session based on telnetlib.
+
+    The options are negotiated the same way as by the telnet client: the terminal type and window size are
+    provided on request, the remote echo and suppress go ahead are accepted and everything else is refused.
+    """
+
+    def __init__(self, hostname, port, connect_timeout=30, rows=512, cols=240, term='vt220'):
+        """Initialize the TelnetSession object and connect."""
+        try:
+            telnet = telnetlib.Telnet(hostname, port, connect_timeout)
+        except socket.timeout:
+            raise ConnectionTimeoutError("Connection timeout", hostname)
+        except socket.error as err:
+            raise ConnectionError("Unable to connect: {}".format(err), hostname)
+
+        self.telnet = telnet
+        self.term = term
+        self._cooked = ''
+        super(TelnetSession, self).__init__(telnet.get_socket())
+        self.rows, self.cols = rows, cols
+        self.linesep = '\r\n'
+        telnet.set_option_negotiation_callback(self._negotiate)
+
+    def setwinsize(self, rows, cols):
+        """Set the terminal window size and send it to the remote end."""
+        super(TelnetSession, self).setwinsize(rows, cols)
+        self._send_naws()
+
+    def close(self, force=True):
+        """Close the Telnet connection."""
+        if not self.closed:
+            self.telnet.close()
+            super(TelnetSession, self).close(force)
+
+    def _negotiate(self, sock, cmd, opt):
+        if cmd == telnetlib.DO:
+            if opt in (telnetlib.TTYPE, telnetlib.NAWS, telnetlib.SGA):
+                sock.sendall(telnetlib.IAC + telnetlib.WILL + opt)
+                if opt == telnetlib.NAWS:
+                    self._send_naws()
+            else:
+                sock.sendall(telnetlib.IAC + telnetlib.WONT + opt)
+        elif cmd == telnetlib.WILL:
+            if opt in (telnetlib.ECHO, telnetlib.SGA):
+                sock.sendall(telnetlib.IAC + telnetlib.DO + opt)
+            else:
+                sock.sendall(telnetlib.IAC + telnetlib.DONT + opt)
+        elif cmd == telnetlib.SE:
+            data = self.telnet.read_sb_data()
+            if data[:2] == telnetlib.TTYPE + chr(1):  # SEND
+                sock.sendall(telnetlib.IAC + telnetlib.SB + telnetlib.TTYPE + chr(0) + self.term +
+                             telnetlib.IAC + telnetlib.SE)
+
+    def _send_naws(self):
+        size = struct.pack('>HH', self.cols, self.rows).replace(telnetlib.IAC, telnetlib.IAC * 2)
+        self.sock.sendall(telnetlib.IAC + telnetlib.SB + telnetlib.NAWS + size + telnetlib.IAC + telnetlib.SE)
+
+    def _recv(self, size):
+        if not self._cooked:
+            self._cooked = self.telnet.read_very_eager()
+            if not self._cooked:
+                return None
+        data, self._cooked = self._cooked[:size], self._cooked[size:]
+        return data
+
+    def _send(self, data):
+        self.telnet.write(data)
+
+    def _pending(self):
+        return bool(self._cooked or self.telnet.cookedq)
+
+    def _alive(self):
+        return self.telnet.get_socket() is not None
@@ -3,11 +3,18 @@
 from logging.handlers import WatchedFileHandler
 import socket
 import codecs
+import json
+import sre_constants
+import sre_parse
+import threading
 import time
 import re
 import os
 import yaml
 
+from condoor.logfile import RotatingFile, index_path
+from condoor.searcher import _UNMERGEABLE_RE
+
 
 def delegate(attribute_name, method_names):
     """Pass the call to the attribute called attribute_name for every method listed in method_names."""
@@ -46,7 +53,7 @@ def to_list(item):
     return [item]
 
 
-def is_reachable(host, port=23):
+def is_reachable(host, port=23, timeout=5, linger=2):
     """Check reachability for specified hostname/port.
 
     It tries to open TCP socket.
@@ -55,6 +62,8 @@ def is_reachable(host, port=23):
     :rtype: str
     :param port: tcp port number
     :rtype: number
+    :param timeout: tcp connect timeout in seconds
+    :param linger: seconds to wait for the socket to shutdown
     :return: True if host is reachable else false
     """
     try:
@@ -66,7 +75,7 @@ def is_reachable(host, port=23):
 
     for family, _, _, _, sockaddr in addresses:
         sock = socket.socket(family, socket.SOCK_STREAM)
-        sock.settimeout(5)
+        sock.settimeout(timeout)
         try:
             sock.connect(sockaddr)
         except IOError:
@@ -74,14 +83,59 @@ def is_reachable(host, port=23):
 
         sock.shutdown(socket.SHUT_RDWR)
         sock.close()
-        # Wait 2 sec for socket to shutdown
-        time.sleep(2)
+        # Wait for socket to shutdown
+        if linger:
+            time.sleep(linger)
         break
     else:
         return False
     return True
 
 
+# (host, port) -> (checked time, reachable) shared by all connections in the process
+_reachability_cache = {}
+_reachability_lock = threading.Lock()
+
+
+def probe_reachability(addresses, timeout=2, ttl=3):
+    """Check reachability for many hostname/port pairs concurrently.
+
+    Each address is probed in a separate thread with is_reachable. The results are cached for ttl seconds,
+    so the connections to the devices behind the same jumphost probe it once. The hostname not resolved
+    locally, i.e. the ssh config alias, is assumed reachable.
+    :param addresses: iterable of (host, port) tuples
+    :param timeout: tcp connect timeout in seconds
+    :param ttl: seconds the probe result is valid
+    :return: dictionary mapping (host, port) to True if reachable else False
+    """
+    now = time.time()
+    results = {}
+    with _reachability_lock:
+        for address in set(addresses):
+            checked = _reachability_cache.get(address)
+            if checked is not None and now - checked[0] < ttl:
+                results[address] = checked[1]
+
+    def probe(host, port):
+        try:
+            socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        except socket.gaierror:
+            reachable = True
+        else:
+            reachable = is_reachable(host, port, timeout=timeout, linger=0)
+        with _reachability_lock:
+            _reachability_cache[(host, port)] = (time.time(), reachable)
+            results[(host, port)] = reachable
+
+    threads = [threading.Thread(target=probe, args=address) for address in set(addresses) if address not in results]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
 def pattern_to_str(pattern):
     """Convert regex pattern to string.
 
@@ -165,16 +219,126 @@ def parse_inventory(inventory_output=None):
     return udi
 
 
+def _required_literal(pattern):
+    """Return the longest literal text every match of the compiled pattern contains or None."""
+    if pattern.flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except (re.error, TypeError):
+        return None
+    longest = run = ""
+    # only the top level literals are mandatory, the repeats, groups and branches end the run
+    for op, value in parsed:
+        if op == sre_constants.LITERAL and value < 256:
+            run += chr(value)
+            if len(run) > len(longest):
+                longest = run
+        else:
+            run = ""
+    return longest or None
+
+
+class Redactor(object):
+    """Replace the secrets matched by the patterns with ***.
+
+    The patterns are combined into the single alternation, so the text is scanned once, or kept separate if
+    can't be combined, i.e. because of the back references, duplicated group names or different flags. The
+    groups of the pattern mark the secrets.
+    The text not containing the literal required by any of the patterns, i.e. 'p://' for the privacy filter,
+    is not scanned at all.
+    """
+
+    def __init__(self, patterns):
+        """Initialize the Redactor object with the list of the pattern strings or compiled patterns."""
+        patterns = [re.compile(pattern) if isinstance(pattern, basestring) else pattern
+                    for pattern in patterns if pattern]
+        literals = [_required_literal(pattern) for pattern in patterns]
+        self.literals = None if None in literals else literals
+        # the group numbers change in the alternation, so the back references would not match
+        singles = [pattern for pattern in patterns if _UNMERGEABLE_RE.search(pattern.pattern)]
+        patterns = [pattern for pattern in patterns if not _UNMERGEABLE_RE.search(pattern.pattern)]
+        flags = set(pattern.flags for pattern in patterns)
+        if len(patterns) > 1 and len(flags) == 1:
+            try:
+                patterns = [re.compile("|".join("(?:{})".format(pattern.pattern) for pattern in patterns),
+                                       flags.pop())]
+            except re.error:
+                pass
+        self.patterns = patterns + singles
+
+    def redact(self, text):
+        """Return the text with the secrets replaced with ***."""
+        if self.literals is not None:
+            for literal in self.literals:
+                if literal in text:
+                    break
+            else:
+                return text
+        for pattern in self.patterns:
+            text = pattern.sub(_mask_groups, text)
+        return text
+
+
+def _mask_groups(match):
+    """Return the matched text with the non empty groups replaced with ***."""
+    text = match.group(0)
+    offset = match.start()
+    result = []
+    last = 0
+    for group in range(1, match.re.groups + 1):
+        start, end = match.span(group)
+        # skip the groups not participating, empty and nested in the already masked one
+        if start == end or start - offset < last:
+            continue
+        result.append(text[last:start - offset])
+        result.append("***")
+        last = end - offset
+    result.append(text[last:])
+    return "".join(result)
+
+
 class FilteredFile(object):
-    """Delegate class for handling filtered file object."""
+    """Delegate class for handling filtered file object.
 
-    __slots__ = ['_file', '_pattern', '_buffer']
+    The text is redacted per complete lines, so the secret split between the written chunks is still found.
+    The redacted text is buffered and written to the file if the buffer exceeds flush_size characters or
+    flush_interval seconds passed since the last write, checked on write, or on :meth:`flush`. The incomplete
+    line is kept to be redacted with the rest of the line and written by :meth:`sync` or on close. The device
+    calls :meth:`sync` after every command, where the incomplete line is the prompt, so the output of the idle
+    session is not kept buffered.
 
-    def __init__(self, filename, mode="r", encoding=None, pattern=None):
-        """Initialize FilteredFile object."""
-        object.__setattr__(self, '_pattern', pattern)
+    The rotate dictionary holds the :class:`condoor.logfile.RotatingFile` arguments, i.e. max_bytes and
+    compression. The file is rotated if max_bytes or interval is set.
+
+    If index is True the command output ranges reported with :meth:`index_start` and :meth:`index_end` are
+    appended to the <filename>.idx sidecar file read by :mod:`condoor.logindex`.
+    """
+
+    __slots__ = ['_file', '_redactor', '_buffer', '_pending', '_pending_size', '_last_write', 'flush_size',
+                 'flush_interval', 'index']
+
+    def __init__(self, filename, mode="r", encoding=None, pattern=None, flush_size=65536, flush_interval=1.0,
+                 rotate=None, index=False):
+        """Initialize FilteredFile object.
+
+        The pattern can be the single pattern or the list of patterns. The pattern groups are replaced
+        with ***.
+        """
+        patterns = pattern if isinstance(pattern, (list, tuple)) else [pattern]
+        object.__setattr__(self, '_redactor', Redactor(patterns))
         object.__setattr__(self, '_buffer', "")
-        if encoding is None:
+        object.__setattr__(self, '_pending', [])
+        object.__setattr__(self, '_pending_size', 0)
+        object.__setattr__(self, '_last_write', time.time())
+        object.__setattr__(self, 'flush_size', flush_size)
+        object.__setattr__(self, 'flush_interval', flush_interval)
+        object.__setattr__(self, 'index', index)
+        if rotate and (rotate.get('max_bytes') or rotate.get('interval')):
+            object.__setattr__(self, '_file', RotatingFile(filename, mode=mode, encoding=encoding, **rotate))
+            # keep the indexed command output in the single segment
+            self._file.defer_rotation = index
+        elif encoding is None:
             object.__setattr__(self, '_file', open(filename, mode=mode))
         else:
             object.__setattr__(self, '_file', codecs.open(filename, mode=mode, encoding=encoding))
@@ -185,33 +349,86 @@ class FilteredFile(object):
 
     def __setattr__(self, name, value):
         """Override standard setattr and delegate to file object."""
-        if name == '_buffer':
-            object.__setattr__(self, '_buffer', value)
+        if name in self.__slots__:
+            object.__setattr__(self, name, value)
         else:
             setattr(self._file, name, value)
 
     def write(self, text):
         """Override the standard write method to filter the content."""
-        index = text.find('\n')
+        index = text.rfind('\n')
         if index == -1:
-            self._buffer = self._buffer + text
-        else:
-            self._buffer = self._buffer + text[:index + 1]
-            if self._pattern:
-                # pattern already compiled no need to check
-                result = re.search(self._pattern, self._buffer)
-                if result:
-                    for group in result.groups():
-                        if group:
-                            self._buffer = self._buffer.replace(group, "***")
-            self._file.write(self._buffer)
-            self._file.flush()
-            self._buffer = text[index + 1:]
+            self._buffer += text
+            return
+        lines = self._buffer + text[:index + 1]
+        self._buffer = text[index + 1:]
+        self._pending.append(self.redact(lines))
+        self._pending_size += len(lines)
+        now = time.time()
+        if self._pending_size >= self.flush_size or now - self._last_write >= self.flush_interval:
+            self._write(now)
+
+    def redact(self, text):
+        """Return the text with the secrets replaced with ***."""
+        return self._redactor.redact(text)
+
+    def flush(self):
+        """Write the redacted complete lines and flush the file."""
+        self._write(time.time())
+
+    def index_start(self, entry):
+        """Store the file offset where the command output starts in the index entry dictionary."""
+        if self.index and not self._file.closed:
+            self._mark()
+            if isinstance(self._file, RotatingFile):
+                self._file.rotate_if_needed()
+            entry['start'] = self._file.tell()
+            entry['rotations'] = getattr(self._file, 'rotations', 0)
+
+    def index_end(self, entry):
+        """Store the file offset where the command output ends in the index entry and append it to the index."""
+        if self.index and not self._file.closed and 'start' in entry:
+            entry['end'] = self._mark()
+            # the output started in the segment rotated because of the size limit
+            if entry.pop('rotations') != getattr(self._file, 'rotations', 0):
+                entry['start'] = 0
+            with open(index_path(self._file.name), 'a') as index:
+                index.write(json.dumps(entry) + '\n')
+
+    def close(self):
+        """Write the buffered text and close the file."""
+        if not self._file.closed:
+            if self._buffer:
+                self._pending.append(self.redact(self._buffer))
+                self._buffer = ""
+            self._write(time.time())
+            self._file.close()
+
+    def sync(self):
+        """Write the redacted text including the incomplete line, i.e. the prompt, and flush the file."""
+        if self._buffer:
+            self._pending.append(self.redact(self._buffer))
+            self._buffer = ""
+        self._write(time.time())
+
+    def _mark(self):
+        # the incomplete line, i.e. the prompt, is written to get the exact offset
+        self.sync()
+        return self._file.tell()
+
+    def _write(self, now):
+        self._last_write = now
+        if self._pending:
+            data = "".join(self._pending)
+            del self._pending[:]
+            self._pending_size = 0
+            self._file.write(data)
+        self._file.flush()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Exit from context."""
         self.write("\r\n")
-        self._file.close()
+        self.close()
 
     def __enter__(self):
         """Enter the context."""
@@ -0,0 +1,137 @@
+#!/usr/bin/env python2
+# =============================================================================
+#
+# Copyright (c) 2018, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+"""Measure the condoor log cost per FSM transition.
+
+The FSM logs three lines per transition. The current FileLogger is measured at the DEBUG and INFO levels and
+disabled, and compared with the FileLogger formatting, locating the caller and writing every line eagerly, as
+before the log levels and buffering were added. The log is written to the temporary file.
+
+    python scripts/bench_log.py [--transitions 20000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from condoor.log import FileLogger  # noqa
+
+
+def _currentframe():
+    try:
+        raise Exception
+    except:  # noqa
+        return sys.exc_info()[2].tb_frame.f_back
+
+
+_srcfile = os.path.normcase(_currentframe.__code__.co_filename)
+
+
+def _find_caller():
+    f = _currentframe()
+    if f is not None:
+        f = f.f_back
+    rv = "(unknown file)", 0, "(unknown function)"
+    while hasattr(f, "f_code"):
+        co = f.f_code
+        filename = os.path.normcase(co.co_filename)
+        if filename == _srcfile:
+            f = f.f_back
+            continue
+        rv = (co.co_filename, f.f_lineno, co.co_name)
+        break
+    return rv
+
+
+class EagerFileLogger(object):
+    """The FileLogger writing and flushing every line, as before the log levels and buffering were added."""
+
+    def __init__(self, fd):
+        self._fd = fd
+
+    def __call__(self, msg):
+        if self._fd and not self._fd.closed:
+            ct = time.time()
+            msecs = (ct - long(ct)) * 1000
+            pathname, lineno, name = _find_caller()
+            try:
+                mod = os.path.splitext(".".join(map(os.path.basename, os.path.split(pathname))))[:-1][0]
+            except (TypeError, ValueError, AttributeError):
+                mod = "Unknown module"
+            ts = time.strftime("%Y-%m-%d %H:%M:%S", (time.localtime(ct)))
+            self._fd.write("%s,%03d %s:%s(%s): %s\n" % (ts, msecs, mod, name, lineno, msg))
+            self._fd.flush()
+
+
+def eager_transition(log, event=1, state=2, timeout=10, response_time=0.123):
+    """Log the transition lines formatted by the caller."""
+    log("E={},S={},T={},RT={:.2f}".format(event, state, timeout, response_time))
+    log("A={}".format("Send the line"))
+    log("NS={},NT={}".format(3, timeout))
+
+
+def lazy_transition(log, event=1, state=2, timeout=10, response_time=0.123):
+    """Log the transition lines passing the arguments to the logger."""
+    log("E={},S={},T={},RT={:.2f}", event, state, timeout, response_time)
+    log("A={}", "Send the line")
+    log("NS={},NT={}", 3, timeout)
+
+
+def main():
+    """Print the time per transition for every logger."""
+    parser = argparse.ArgumentParser(description="Measure the condoor log cost per FSM transition.")
+    parser.add_argument("--transitions", type=int, default=20000, help="Number of transitions per run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs. The fastest run is reported.")
+    args = parser.parse_args()
+
+    fd, filename = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    try:
+        with open(filename, "w") as log_file:
+            loggers = [
+                ("before, eager", EagerFileLogger(log_file), eager_transition),
+                ("DEBUG level", FileLogger(log_file, level=logging.DEBUG), lazy_transition),
+                ("INFO level", FileLogger(log_file, level=logging.INFO), lazy_transition),
+                ("disabled", FileLogger(log_file, level=0), lazy_transition),
+            ]
+            for name, logger, transition in loggers:
+                elapsed = min(timeit.repeat(lambda: transition(logger), number=args.transitions,
+                                            repeat=args.repeat))
+                print("{:<16} {:6.2f} us/transition".format(name, elapsed / args.transitions * 1e6))
+    finally:
+        os.unlink(filename)
+
+
+if __name__ == '__main__':
+    main()
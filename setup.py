@@ -116,7 +116,8 @@ setup(
     package_data={'': ['LICENSE', ], },
     package_dir={'condoor': 'condoor'},
     include_package_data=True,
-    install_requires=['pexpect>=4.2.1', 'pyyaml'],
+    install_requires=['pexpect>=4.5.0', 'pyyaml'],
+    extras_require={'native': ['paramiko'], 'zstd': ['zstandard']},
     data_files=[('condoor', ['condoor/patterns.yaml', 'condoor/config.yaml'])],
     license='Apache 2.0',
     classifiers=CLASSIFIERS,
@@ -0,0 +1,153 @@
+import os
+import socket
+import threading
+
+import paramiko
+
+
+class SSHServerInterface(paramiko.ServerInterface):
+    """Password authenticated interactive shell"""
+
+    USERNAME = "admin"
+    PASSWORD = "admin"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_REQUEST
+
+    def check_auth_password(self, username, password):
+        if username == self.USERNAME and password == self.PASSWORD:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        return True
+
+    def check_channel_window_change_request(self, channel, width, height, pixelwidth, pixelheight):
+        return True
+
+
+class DeviceShell(object):
+    """Generic device shell served over the SSH channel"""
+
+    platform = None
+    PROMPT = "IOS#"
+    WRONGCOMMAND = "% Invalid input detected at '^' marker."
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_response(self, command_line):
+        directory = os.path.dirname(os.path.realpath(__file__))
+        filename = os.path.join(directory, self.platform.lower(), command_line + ".txt")
+        try:
+            with open(filename) as f:
+                return f.read()
+        except IOError:
+            return None
+
+    def write(self, text):
+        self.channel.sendall(text.replace("\r\n", "\n").replace("\n", "\r\n"))
+
+    def readline(self):
+        line = ""
+        while True:
+            char = self.channel.recv(1)
+            if not char:
+                return None
+            if char in "\r\n":
+                self.write("\n")
+                return line
+            self.channel.sendall(char)
+            line += char
+
+    def handle(self, line):
+        params = line.split()
+        if not params:
+            return True
+        if params[0] == 'exit':
+            return False
+        if params[0] == 'terminal':
+            return True
+        response = self.get_response("_".join(params))
+        if response is None:
+            response = self.WRONGCOMMAND + "\n"
+        self.write(response)
+        return True
+
+    def run(self):
+        try:
+            while True:
+                self.write(self.PROMPT)
+                line = self.readline()
+                if line is None or not self.handle(line.strip()):
+                    break
+        except socket.error:
+            pass
+        finally:
+            self.channel.close()
+
+
+class ASR901Shell(DeviceShell):
+    platform = "ASR901"
+    PROMPT = "CSG-1202-ASR901#"
+
+
+class SSHServer(object):
+    """Threaded SSH server serving the device shell for every session channel"""
+
+    host_key = None
+
+    def __init__(self, address, shell):
+        self.shell = shell
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(address)
+        self.sock.listen(5)
+        self.transports = []
+        if SSHServer.host_key is None:
+            SSHServer.host_key = paramiko.RSAKey.generate(2048)
+
+    def serve_forever(self):
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except socket.error:
+                break
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            try:
+                transport.start_server(server=SSHServerInterface())
+            except (paramiko.SSHException, EOFError):
+                # i.e. the reachability probe closing the connection before the key exchange
+                transport.close()
+                continue
+            self.transports.append(transport)
+            thread = threading.Thread(target=self.accept_channels, args=(transport,))
+            thread.daemon = True
+            thread.start()
+
+    def accept_channels(self, transport):
+        while transport.is_active():
+            channel = transport.accept(1)
+            if channel is None:
+                continue
+            thread = threading.Thread(target=self.shell(channel).run)
+            thread.daemon = True
+            thread.start()
+
+    def server_close(self):
+        for transport in self.transports:
+            transport.close()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.sock.close()
@@ -0,0 +1,153 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from multiprocessing import Pool
+from unittest import TestCase
+
+from condoor.cache import make_cache, SQLiteCache, ShelveCache
+
+PROCESSES = 50
+
+
+def hit_cache(args):
+    path, index = args
+    cache = make_cache('sqlite', path)
+    record = {'connections': [{'chain': [{'hostname': 'host{}'.format(index)}]}], 'last_chain': 0}
+    cache.set("key{}".format(index), record)
+    for other in range(PROCESSES):
+        try:
+            cache.get("key{}".format(other))
+        except KeyError:
+            pass
+    return cache.get("key{}".format(index)) == record
+
+
+class CacheTestMixin(object):
+    backend = None
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "condoor")
+        self.cache = make_cache(self.backend, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_set_get(self):
+        record = {'connections': [{'chain': [{'hostname': 'router'}]}], 'last_chain': 0}
+        self.cache.set("key", record)
+        self.assertEqual(self.cache.get("key"), record)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_missing_key(self):
+        self.cache.set("key", None)
+        with self.assertRaises(KeyError):
+            self.cache.get("other")
+
+    def test_delete(self):
+        self.cache.set("key", "value")
+        self.cache.delete("key")
+        self.cache.delete("other")
+        with self.assertRaises(KeyError):
+            self.cache.get("key")
+
+    def test_ttl(self):
+        self.cache.set("short", "value", ttl=0.1)
+        self.cache.set("long", "value", ttl=60)
+        time.sleep(0.2)
+        with self.assertRaises(KeyError):
+            self.cache.get("short")
+        self.assertEqual(self.cache.get("long"), "value")
+        self.assertEqual(len(self.cache), 1)
+
+
+class TestSQLiteCache(CacheTestMixin, TestCase):
+    backend = 'sqlite'
+
+    def test_wal_mode(self):
+        self.cache.set("key", "value")
+        db = sqlite3.connect(self.cache.filename)
+        self.assertEqual(db.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        db.close()
+
+    def test_lru_cap(self):
+        cache = SQLiteCache(self.path, max_entries=3)
+        for index in range(3):
+            cache.set("key{}".format(index), index)
+            time.sleep(0.01)
+        cache.get("key0")
+        cache.set("key3", 3)
+        self.assertEqual(len(cache), 3)
+        with self.assertRaises(KeyError):
+            cache.get("key1")
+        self.assertEqual(cache.get("key0"), 0)
+
+    def test_schema_version(self):
+        self.cache.set("key", "value")
+
+        class NewSQLiteCache(SQLiteCache):
+            SCHEMA_VERSION = SQLiteCache.SCHEMA_VERSION + 1
+
+        cache = NewSQLiteCache(self.path)
+        with self.assertRaises(KeyError):
+            cache.get("key")
+        cache.set("key", "new")
+        self.assertEqual(cache.get("key"), "new")
+
+    def test_concurrent_processes(self):
+        pool = Pool(PROCESSES)
+        try:
+            results = pool.map(hit_cache, [(self.path, index) for index in range(PROCESSES)])
+        finally:
+            pool.close()
+            pool.join()
+        self.assertTrue(all(results), "Cache hit missed")
+        self.assertEqual(len(self.cache), PROCESSES)
+
+
+class TestShelveCache(CacheTestMixin, TestCase):
+    backend = 'shelve'
+
+
+class TestMakeCache(TestCase):
+    def test_backends(self):
+        self.assertIsInstance(make_cache('sqlite', '/tmp/condoor'), SQLiteCache)
+        self.assertIsInstance(make_cache('shelve', '/tmp/condoor'), ShelveCache)
+        self.assertIsInstance(make_cache('condoor.cache.ShelveCache', '/tmp/condoor'), ShelveCache)
+        self.assertEqual(make_cache('sqlite', '/tmp/condoor').filename, '/tmp/condoor.sqlite')
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            make_cache('redis', '/tmp/condoor')
+        with self.assertRaises(ValueError):
+            make_cache('condoor.cache.RedisCache', '/tmp/condoor')
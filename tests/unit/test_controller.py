@@ -0,0 +1,136 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import re
+import socket
+import time
+from threading import Thread
+from unittest import TestCase
+
+from mock import Mock
+import pexpect
+
+from condoor.controller import Controller
+from condoor.searcher import Searcher
+from condoor.transport import SocketSession
+
+
+class PairSession(SocketSession):
+    def _recv(self, size):
+        return self.sock.recv(size)
+
+    def _send(self, data):
+        self.sock.sendall(data)
+
+
+class TestOutputCallback(TestCase):
+    def setUp(self):
+        self.local, self.remote = socket.socketpair()
+        self.ctrl = Controller(Mock())
+        self.ctrl.attach(PairSession(self.local, timeout=5))
+        self.searcher = Searcher([re.compile("router#"), re.compile("--More--"), pexpect.TIMEOUT])
+        self.chunks = []
+        self.ctrl.output_callback = self.chunks.append
+
+    def tearDown(self):
+        self.ctrl.detach().close()
+        self.remote.close()
+
+    def test_output_streamed(self):
+        """Controller: Test the output is passed to the callback except the matched pattern"""
+        lines = ["line {}\r\n".format(i) for i in range(2000)]
+
+        def writer():
+            for i in range(0, len(lines), 100):
+                self.remote.sendall("".join(lines[i:i + 100]))
+                time.sleep(0.01)
+            self.remote.sendall("router#")
+
+        thread = Thread(target=writer)
+        thread.start()
+        index = self.ctrl.expect(self.searcher, timeout=5, searchwindowsize=100)
+        thread.join()
+
+        self.assertEqual(index, 0)
+        self.assertGreater(len(self.chunks), 1)
+        self.assertEqual("".join(self.chunks), "".join(lines))
+        self.assertLessEqual(len(self.ctrl._session.before), 100 + 65536)
+
+    def test_more_pattern_not_streamed(self):
+        """Controller: Test the paging pattern is not passed to the callback"""
+        self.remote.sendall("page1\r\n--More--")
+        self.assertEqual(self.ctrl.expect(self.searcher, timeout=5, searchwindowsize=100), 1)
+        self.remote.sendall("page2\r\nrouter#")
+        self.assertEqual(self.ctrl.expect(self.searcher, timeout=5, searchwindowsize=100), 0)
+        self.assertEqual("".join(self.chunks), "page1\r\npage2\r\n")
+
+    def test_timeout_not_streamed(self):
+        """Controller: Test the output is not passed on timeout"""
+        self.remote.sendall("partial")
+        self.assertEqual(self.ctrl.expect(self.searcher, timeout=0.2, searchwindowsize=100), 2)
+        self.assertEqual(self.chunks, [])
+
+
+class TestValidatePrompt(TestCase):
+    def setUp(self):
+        self.local, self.remote = socket.socketpair()
+        self.ctrl = Controller(Mock())
+        self.ctrl.attach(PairSession(self.local, timeout=5))
+
+    def tearDown(self):
+        self.ctrl.detach().close()
+        self.remote.close()
+
+    def respond(self, response):
+        def responder():
+            self.remote.recv(1024)
+            self.remote.sendall(response)
+
+        thread = Thread(target=responder)
+        thread.start()
+        return thread
+
+    def test_prompt_validated(self):
+        """Controller: Test the known prompt validated after the stale output is discarded"""
+        self.remote.sendall("\r\nrouter#")
+        time.sleep(0.1)
+        thread = self.respond("\r\nrouter# ")
+        self.assertTrue(self.ctrl.validate_prompt("router#", timeout=1))
+        thread.join()
+
+    def test_prompt_not_validated(self):
+        """Controller: Test the different prompt not validated"""
+        thread = self.respond("\r\nrouter>")
+        self.assertFalse(self.ctrl.validate_prompt("router#", timeout=0.5))
+        thread.join()
+
+    def test_prompt_not_last(self):
+        """Controller: Test the prompt followed by other output not validated"""
+        thread = self.respond("\r\nrouter#\r\n% Login banner")
+        self.assertFalse(self.ctrl.validate_prompt("router#", timeout=0.5))
+        thread.join()
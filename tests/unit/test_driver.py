@@ -0,0 +1,68 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import re
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from condoor.drivers.generic import Driver
+
+
+class TestWaitForStringCache(TestCase):
+    def setUp(self):
+        self.device = Mock()
+        self.device.hostname = "host"
+        self.device.get_previous_prompts.return_value = [re.compile("jumphost\$")]
+        self.driver = Driver(self.device)
+        self.prompt_re = re.compile("router#")
+
+    @patch('condoor.drivers.generic.FSM')
+    def test_fsm_reused(self, fsm_class):
+        """Driver: Test the wait_for_string FSM is built once for the same prompts"""
+        self.driver.wait_for_string(self.prompt_re, timeout=10)
+        self.driver.wait_for_string(self.prompt_re, timeout=20)
+        self.assertEqual(fsm_class.call_count, 1)
+        self.assertEqual(fsm_class.return_value.run.call_count, 2)
+        self.assertEqual(fsm_class.return_value.timeout, 20)
+
+    @patch('condoor.drivers.generic.FSM')
+    def test_fsm_invalidated(self, fsm_class):
+        """Driver: Test the wait_for_string FSM is rebuilt when prompts or controller change"""
+        self.driver.wait_for_string(self.prompt_re)
+        self.driver.wait_for_string(re.compile("router\(config\)#"))
+        self.assertEqual(fsm_class.call_count, 2)
+
+        self.device.get_previous_prompts.return_value = [re.compile("other\$")]
+        self.driver.wait_for_string(self.prompt_re)
+        self.assertEqual(fsm_class.call_count, 3)
+
+        self.device.ctrl = Mock()
+        self.driver.wait_for_string(self.prompt_re)
+        self.assertEqual(fsm_class.call_count, 4)
@@ -142,6 +142,48 @@ class TestFSM(TestCase):
         with self.assertRaises(condoor.ConnectionTimeoutError):
             sm.run()
 
+    def test_fsm_exception_not_shared(self):
+        """FSM: Test the new exception instance is raised on every run"""
+
+        class Ctrl(object):
+            hostname = "hostname"
+
+            def expect(self, events, searchwindowsize, timeout):
+                pass
+
+        class Connection(object):
+            def log(self, msg):
+                print(msg)
+
+        class Chain(object):
+            connection = Mock(spec=Connection)
+
+        class Device(object):
+            ctrl = Mock(spec=Ctrl)
+            chain = Mock(spec=Chain)
+
+        device = Mock(spec=Device)
+        device.ctrl.expect.return_value = 0
+
+        error = condoor.CommandSyntaxError("Command unknown", "hostname")
+        sm = FSM("FSM", device, events=["ERROR"], transitions=[("ERROR", [0], -1, error, 0)], timeout=1)
+
+        raised = []
+        for command in ("first", "second"):
+            try:
+                sm.run()
+            except condoor.CommandSyntaxError as err:
+                self.assertIsNone(err.command)
+                err.command = command
+                raised.append(err)
+
+        self.assertEqual(len(raised), 2)
+        self.assertIsNot(raised[0], raised[1])
+        self.assertIsNot(raised[0], error)
+        self.assertEqual(str(raised[0]), "hostname: Command unknown: 'first'")
+        self.assertEqual(str(raised[1]), "hostname: Command unknown: 'second'")
+        self.assertIsNone(error.command)
+
     def test_fsm_event_not_list(self):
         """FSM: Test single event"""
 
@@ -0,0 +1,76 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import inspect
+import logging
+from StringIO import StringIO
+from unittest import TestCase
+
+from condoor.log import FileLogger
+
+
+class NotFormatted(object):
+    def __format__(self, spec):
+        raise AssertionError("Disabled message formatted")
+
+
+class TestFileLogger(TestCase):
+    def setUp(self):
+        self.fd = StringIO()
+
+    def test_format(self):
+        log = FileLogger(self.fd, buffer_size=0)
+        lineno = inspect.currentframe().f_lineno + 1
+        log("E={},S={}", 1, 2)
+        log("Literal {braces}")
+        lines = self.fd.getvalue().splitlines()
+        self.assertTrue(lines[0].endswith(" unit.test_log:test_format({}): E=1,S=2".format(lineno)), lines[0])
+        self.assertTrue(lines[1].endswith(": Literal {braces}"), lines[1])
+
+    def test_level(self):
+        log = FileLogger(self.fd, level=logging.INFO, buffer_size=0)
+        log("Debug {}", NotFormatted())
+        log.log(logging.DEBUG, "Debug {}", NotFormatted())
+        log.log(logging.ERROR, "Error")
+        self.assertEqual(len(self.fd.getvalue().splitlines()), 1)
+        self.assertFalse(log.is_enabled_for(logging.DEBUG))
+
+    def test_disabled(self):
+        log = FileLogger(self.fd, level=logging.NOTSET, buffer_size=0)
+        log.log(logging.ERROR, "Error {}", NotFormatted())
+        self.assertEqual(self.fd.getvalue(), "")
+
+    def test_buffered(self):
+        log = FileLogger(self.fd, buffer_size=1024, flush_interval=60)
+        log("Debug")
+        self.assertEqual(self.fd.getvalue(), "")
+        log.log(logging.INFO, "Info")
+        self.assertEqual(len(self.fd.getvalue().splitlines()), 2)
+        log("Debug")
+        log.flush()
+        self.assertEqual(len(self.fd.getvalue().splitlines()), 3)
@@ -0,0 +1,132 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, skipIf
+
+from condoor import logfile
+from condoor.logfile import RotatingFile, open_log, segments
+from condoor.utils import FilteredFile
+
+
+class TestRotatingFile(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "session.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_lines(self, log, count):
+        lines = ["line {:05d} {}\n".format(index, "x" * 50) for index in range(count)]
+        for line in lines:
+            log.write(line)
+        log.close()
+        logfile._compressor.join()
+        return "".join(lines)
+
+    def test_size_rotation_gzip(self):
+        log = RotatingFile(self.filename, max_bytes=4096, compression='gzip')
+        expected = self.write_lines(log, 500)
+        paths = segments(self.filename)
+        self.assertGreater(len(paths), 5)
+        self.assertTrue(all(path.endswith('.gz') for path in paths))
+        self.assertLessEqual(os.path.getsize(self.filename), 4096)
+        with open_log(self.filename) as log:
+            self.assertEqual(log.read(), expected)
+        with open_log(self.filename) as log:
+            self.assertEqual("".join(log), expected)
+
+    @skipIf(logfile.zstandard is None, "zstandard not installed")
+    def test_size_rotation_zstd(self):
+        log = RotatingFile(self.filename, max_bytes=4096, compression='zstd')
+        expected = self.write_lines(log, 500)
+        self.assertTrue(all(path.endswith('.zst') for path in segments(self.filename)))
+        with open_log(self.filename) as log:
+            self.assertEqual(log.read(), expected)
+
+    def test_backup_count(self):
+        log = RotatingFile(self.filename, max_bytes=1024, backup_count=3)
+        expected = self.write_lines(log, 500)
+        self.assertEqual(len(segments(self.filename)), 3)
+        with open_log(self.filename) as log:
+            content = log.read()
+        self.assertTrue(expected.endswith(content))
+
+    def test_time_rotation(self):
+        log = RotatingFile(self.filename, interval=0.1)
+        log.write("first\n")
+        time.sleep(0.15)
+        log.write("second\n")
+        log.write("third\n")
+        log.close()
+        self.assertEqual(len(segments(self.filename)), 1)
+        with open_log(self.filename) as log:
+            self.assertEqual(log.readline(), "first\n")
+            self.assertEqual(log.read(3), "sec")
+            self.assertEqual(log.read(), "ond\nthird\n")
+
+    def test_shared_file(self):
+        first = RotatingFile(self.filename, max_bytes=100)
+        second = RotatingFile(self.filename, max_bytes=100)
+        first.write("a" * 99 + "\n")
+        second.write("b\n")
+        first.close()
+        second.close()
+        self.assertEqual(len(segments(self.filename)), 1)
+        with open_log(self.filename) as log:
+            self.assertEqual(log.read(), "a" * 99 + "\nb\n")
+
+    def test_compress_left_segments(self):
+        with open(self.filename + ".20261018-101010", "w") as segment:
+            segment.write("old\n")
+        log = RotatingFile(self.filename, max_bytes=1024, compression='gzip')
+        log.write("new\n")
+        log.close()
+        logfile._compressor.join()
+        self.assertEqual(segments(self.filename), [self.filename + ".20261018-101010.gz"])
+        with open_log(self.filename) as log:
+            self.assertEqual(log.read(), "old\nnew\n")
+
+    def test_unknown_compression(self):
+        self.assertRaises(ValueError, RotatingFile, self.filename, max_bytes=1024, compression='lzma')
+
+    def test_filtered_file(self):
+        log = FilteredFile(self.filename, mode="a", pattern=r"password (\S+)", flush_size=0,
+                           rotate={'max_bytes': 64, 'interval': 0, 'backup_count': 0, 'compression': 'gzip'})
+        expected = self.write_lines(log, 10)
+        log = FilteredFile(self.filename, mode="a", pattern=r"password (\S+)", flush_size=0,
+                           rotate={'max_bytes': 64, 'interval': 0, 'backup_count': 0, 'compression': 'gzip'})
+        log.write("password secret\n")
+        log.close()
+        logfile._compressor.join()
+        with open_log(self.filename) as log:
+            self.assertEqual(log.read(), expected + "password ***\n")
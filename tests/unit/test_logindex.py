@@ -0,0 +1,117 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from StringIO import StringIO
+from unittest import TestCase
+
+from condoor import logfile
+from condoor.logindex import LogIndex, main, open_indexes, read_index
+from condoor.utils import FilteredFile
+
+
+class TestLogIndex(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "session.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def send(self, log, command, output, outcome='ok'):
+        entry = {'command': command, 'device': 'router', 'start_time': time.time()}
+        log.index_start(entry)
+        log.write("{}\r\n{}\r\nrouter#".format(command, output))
+        entry['end_time'] = time.time()
+        entry['outcome'] = outcome
+        log.index_end(entry)
+
+    def test_output(self):
+        log = FilteredFile(self.filename, mode="a", pattern=r"password (\S+)", index=True)
+        log.write("router#")
+        self.send(log, "show version", "Version 1.0\r\npassword secret")
+        self.send(log, "show users", "admin", outcome='timeout')
+        self.send(log, "show version", "Version 1.1")
+        log.close()
+
+        self.assertEqual([entry.command for entry in read_index(self.filename)],
+                         ["show version", "show users", "show version"])
+        with LogIndex(self.filename) as index:
+            first, second = index.find("show version", device="router")
+            self.assertEqual(index.output(first), "show version\r\nVersion 1.0\r\npassword ***\r\nrouter#")
+            self.assertEqual(index.output(second), "show version\r\nVersion 1.1\r\nrouter#")
+            entry, = index.find("show users")
+            self.assertEqual(entry.outcome, 'timeout')
+            self.assertEqual(index.find("show users", device="switch"), [])
+
+    def test_no_index(self):
+        log = FilteredFile(self.filename, mode="a")
+        self.send(log, "show version", "Version 1.0")
+        log.close()
+        self.assertFalse(os.path.exists(self.filename + ".idx"))
+        self.assertEqual(open_indexes(self.filename), [])
+
+    def test_rotated_segments(self):
+        log = FilteredFile(self.filename, mode="a", flush_size=0, index=True,
+                           rotate={'max_bytes': 100, 'interval': 0, 'backup_count': 0, 'compression': 'gzip'})
+        for index in range(10):
+            self.send(log, "show clock", "{:02d}:00:00 {}".format(index, "x" * 50))
+        log.close()
+        logfile._compressor.join()
+
+        indexes = open_indexes(self.filename)
+        self.assertGreater(len(indexes), 1)
+        outputs = [index.output(entry) for index in indexes for entry in index.find("show clock")]
+        for index in indexes:
+            index.close()
+        self.assertEqual(outputs, ["show clock\r\n{:02d}:00:00 {}\r\nrouter#".format(index, "x" * 50)
+                                   for index in range(10)])
+
+    def test_main(self):
+        log = FilteredFile(self.filename, mode="a", index=True)
+        self.send(log, "show version", "Version 1.0")
+        self.send(log, "show version", "Version 1.1")
+        log.close()
+
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            self.assertEqual(main([self.filename, "show version", "--last"]), 0)
+            self.assertEqual(main([self.filename, "--list", "--device", "router"]), 0)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        lines = output.splitlines()
+        self.assertEqual(lines[:3], ["show version", "Version 1.1", "router#"])
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[3].startswith("router ") and lines[3].endswith(" ok {} show version".format(
+            self.filename)))
@@ -0,0 +1,139 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from condoor.logindex import read_index
+from condoor.logwriter import LogWriter
+
+
+class BlockedLogWriter(LogWriter):
+    """The writer waiting for the event before handling the first record."""
+
+    def __init__(self, *args, **kwargs):
+        super(BlockedLogWriter, self).__init__(*args, **kwargs)
+        self.unblock = threading.Event()
+
+    def _handle(self, op, filename, data):
+        self.unblock.wait()
+        super(BlockedLogWriter, self)._handle(op, filename, data)
+
+
+class TestLogWriter(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name)) as log:
+            return log.read()
+
+    def test_many_threads(self):
+        writer = LogWriter()
+        lines = 500
+
+        def log(name):
+            log_file = writer.open(os.path.join(self.directory, name), mode="a")
+            for index in range(lines):
+                log_file.write("{} {}\n".format(threading.current_thread().name, index))
+            log_file.close()
+
+        threads = [threading.Thread(target=log, args=("session-{}.log".format(index % 2),), name="t{}".format(index))
+                   for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(writer.sync())
+
+        for index in range(2):
+            content = self.read("session-{}.log".format(index)).splitlines()
+            self.assertEqual(len(content), 4 * lines)
+            for name in ("t{}".format(thread) for thread in range(index, 8, 2)):
+                self.assertEqual([line for line in content if line.split()[0] == name],
+                                 ["{} {}".format(name, line) for line in range(lines)])
+        self.assertEqual(writer.stats()['dropped'], 0)
+        writer.stop()
+
+    def test_backpressure(self):
+        writer = BlockedLogWriter(max_size=5, flush_interval=0.1)
+        log_file = writer.open(os.path.join(self.directory, "session.log"), mode="a")
+        start = time.time()
+        for index in range(50):
+            log_file.write("{}\n".format(index))
+        self.assertLess(time.time() - start, 1, "Write blocked")
+        stats = writer.stats()
+        self.assertGreater(stats['dropped'], 0)
+        self.assertEqual(stats['dropped'], stats['dropped_per_file'][os.path.join(self.directory, "session.log")])
+
+        writer.unblock.set()
+        log_file.close()
+        self.assertTrue(writer.sync())
+        self.assertEqual(len(self.read("session.log").splitlines()) + stats['dropped'], 50)
+        writer.stop()
+
+    def test_shared_file(self):
+        writer = LogWriter()
+        filename = os.path.join(self.directory, "session.log")
+        first = writer.open(filename, mode="a")
+        second = writer.open(filename, mode="a")
+        first.write("first\n")
+        first.close()
+        second.write("second\n")
+        self.assertTrue(writer.sync())
+        self.assertEqual(self.read("session.log"), "first\nsecond\n")
+        second.close()
+        writer.stop()
+        self.assertFalse(writer._files)
+
+    def test_shared_file_incomplete_lines(self):
+        writer = LogWriter()
+        filename = os.path.join(self.directory, "session.log")
+        first = writer.open(filename, mode="a", pattern=r'password (\S+)', index=True)
+        second = writer.open(filename, mode="a", pattern=r'password (\S+)', index=True)
+        entry = {'command': "show run"}
+        first.index_start(entry)
+        first.write("password se")
+        second.write("other\nsecond>")
+        first.write("cret\nfirst>")
+        first.index_end(entry)
+        first.close()
+        second.close()
+        self.assertTrue(writer.sync())
+        text = self.read("session.log")
+        self.assertEqual(text, "other\npassword ***\nfirst>second>")
+        index_entry, = read_index(filename)
+        self.assertEqual(text[index_entry.start:index_entry.end], "other\npassword ***\nfirst>")
+        writer.stop()
@@ -0,0 +1,63 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import socket
+from unittest import TestCase
+
+from condoor.utils import probe_reachability
+
+
+class TestProbeReachability(TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(5)
+        self.open_port = self.server.getsockname()[1]
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(('127.0.0.1', 0))
+        self.closed_port = closed.getsockname()[1]
+        closed.close()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_probe(self):
+        results = probe_reachability([('127.0.0.1', self.open_port), ('127.0.0.1', self.closed_port),
+                                      ('127.0.0.1', self.open_port)], timeout=1, ttl=0)
+        self.assertEqual(results, {('127.0.0.1', self.open_port): True, ('127.0.0.1', self.closed_port): False})
+
+    def test_cached(self):
+        address = ('127.0.0.1', self.open_port)
+        self.assertTrue(probe_reachability([address], timeout=1, ttl=60)[address])
+        self.server.close()
+        self.assertTrue(probe_reachability([address], timeout=1, ttl=60)[address], "Result not cached")
+        self.assertFalse(probe_reachability([address], timeout=1, ttl=0)[address], "Expired result used")
+
+    def test_not_resolved(self):
+        address = ('no-such-host.invalid', 22)
+        self.assertTrue(probe_reachability([address], timeout=1, ttl=0)[address])
@@ -0,0 +1,54 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+from unittest import TestCase
+
+from condoor.retry import make_retry_policy, ExponentialBackoff, FixedDelay
+
+
+class TestRetryPolicy(TestCase):
+    def test_exponential_backoff(self):
+        policy = ExponentialBackoff(initial_delay=1, max_delay=10, factor=2)
+        self.assertEqual([policy.delay(failures) for failures in range(1, 7)], [1, 2, 4, 8, 10, 10])
+
+    def test_jitter(self):
+        policy = ExponentialBackoff(initial_delay=4, max_delay=10, factor=2, jitter=0.5)
+        for _ in range(100):
+            delay = policy.delay(1)
+            self.assertTrue(2 <= delay <= 4, "Delay out of range: {}".format(delay))
+
+    def test_fixed_delay(self):
+        policy = FixedDelay(max_delay=30)
+        self.assertEqual(policy.delay(1), 30)
+        self.assertEqual(policy.delay(5), 30)
+
+    def test_make_retry_policy(self):
+        self.assertIsInstance(make_retry_policy('exponential'), ExponentialBackoff)
+        self.assertIsInstance(make_retry_policy('condoor.retry.FixedDelay'), FixedDelay)
+        with self.assertRaises(ValueError):
+            make_retry_policy('linear')
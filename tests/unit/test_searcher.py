@@ -0,0 +1,117 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import re
+from unittest import TestCase
+
+import pexpect
+from pexpect.expect import searcher_re
+
+from condoor import pattern_manager
+from condoor.searcher import Searcher
+
+
+def make_reference(events):
+    patterns = [re.compile(event, re.DOTALL) if isinstance(event, str) else event for event in events]
+    return searcher_re(patterns)
+
+
+class TestSearcher(TestCase):
+    def setUp(self):
+        self.events = [
+            pattern_manager.pattern('XR', 'syntax_error'),
+            pattern_manager.pattern('XR', 'connection_closed'),
+            re.compile("[\r\n]RP/0/RSP0/CPU0:ios[#>]", re.MULTILINE),
+            pattern_manager.pattern('XR', 'press_return'),
+            pattern_manager.pattern('XR', 'more'),
+            pexpect.TIMEOUT,
+            pexpect.EOF,
+            pattern_manager.pattern('XR', 'buffer_overflow'),
+            re.compile("(?!x)x"),
+            pattern_manager.pattern('jumphost', 'prompt'),
+        ]
+        self.buffers = [
+            "",
+            "show version\r\nCisco IOS XR Software\r\nRP/0/RSP0/CPU0:ios#",
+            "show vers\r\n       ^\r\n% Invalid input detected at '^' marker.\r\nRP/0/RSP0/CPU0:ios#",
+            "line1\r\nline2\r\n --More-- ",
+            "Connection closed by foreign host.\r\n[user@jumphost ~]$ ",
+            "RP/0/RSP0/CPU0:ios#",
+        ]
+
+    def assertSameResult(self, events, buf, searchwindowsize=None):
+        reference = make_reference(events)
+        searcher = Searcher(events)
+        expected = reference.search(buf, len(buf), searchwindowsize)
+        result = searcher.search(buf, len(buf), searchwindowsize)
+        self.assertEqual(result, expected, "Different event for {}".format(repr(buf)))
+        if expected >= 0:
+            self.assertEqual((searcher.start, searcher.end), (reference.start, reference.end))
+            self.assertEqual(searcher.match.group(0), reference.match.group(0))
+            self.assertEqual(searcher.match.groups(), reference.match.groups())
+
+    def test_same_as_pexpect(self):
+        """Searcher: Test the same result as pexpect searcher"""
+        for buf in self.buffers:
+            self.assertSameResult(self.events, buf)
+            self.assertSameResult(self.events, buf, searchwindowsize=10)
+
+    def test_eof_and_timeout_index(self):
+        """Searcher: Test EOF and TIMEOUT index"""
+        searcher = Searcher(self.events)
+        self.assertEqual(searcher.timeout_index, 5)
+        self.assertEqual(searcher.eof_index, 6)
+
+    def test_lower_index_wins(self):
+        """Searcher: Test the lower index wins when matched at the same position"""
+        events = ["abc", "ab", re.compile("a(b)"), "b"]
+        self.assertSameResult(events, "xxabc")
+        self.assertSameResult(list(reversed(events)), "xxabc")
+
+    def test_named_group_conflict(self):
+        """Searcher: Test patterns with the same group names"""
+        events = [re.compile("(?P<hostname>host)#"), re.compile("(?P<hostname>\w+)>")]
+        self.assertSameResult(events, "router>")
+        self.assertSameResult(events, "host#")
+        searcher = Searcher(events)
+        searcher.search("router>", 7)
+        self.assertEqual(searcher.match.group('hostname'), "router")
+
+    def test_unmergeable_patterns(self):
+        """Searcher: Test back references and inline flags"""
+        events = [re.compile(r"(a)\1"), "(?i)prompt", "b+"]
+        for buf in ["xaa", "PROMPT", "xbb", "bb aa"]:
+            self.assertSameResult(events, buf)
+
+    def test_conditional_group_reference(self):
+        """Searcher: Test conditional group references"""
+        events = ["(x)?y", re.compile(r"(<)?host(?(1)>|#)"), re.compile(r"(?P<open>\[)?user(?(open)\]|\$)"), "z"]
+        for buf in ["<host>", "host#", "<host#", "[user]", "user$", "xy", "z"]:
+            self.assertSameResult(events, buf)
+        searcher = Searcher(events)
+        self.assertEqual(sorted(index for index, _ in searcher._singles), [1, 2])
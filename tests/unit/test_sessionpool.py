@@ -0,0 +1,80 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from condoor.sessionpool import SessionPool
+
+
+def make_session(alive=True):
+    session = Mock()
+    session.isalive.return_value = alive
+    return session
+
+
+class TestSessionPool(TestCase):
+    def setUp(self):
+        self.pool = SessionPool()
+        self.key = (('telnet', 'jumphost', 23, 'admin', 'admin', None),)
+        self.jumphosts = [("jumphost$", {'os_version': None})]
+
+    def test_checkout_released_session(self):
+        """SessionPool: Test the released session is checked out once"""
+        session = make_session()
+        self.pool.checkin(self.key, session, self.jumphosts, max_idle=4)
+        pooled = self.pool.checkout(self.key, idle_timeout=60)
+        self.assertIs(pooled.session, session)
+        self.assertEqual(pooled.jumphosts, self.jumphosts)
+        self.assertIsNone(self.pool.checkout(self.key, idle_timeout=60))
+        self.assertIsNone(self.pool.checkout((), idle_timeout=60))
+
+    def test_max_idle(self):
+        """SessionPool: Test the oldest idle session is closed when max_idle exceeded"""
+        sessions = [make_session() for _ in range(3)]
+        for session in sessions:
+            self.pool.checkin(self.key, session, self.jumphosts, max_idle=2)
+        self.assertEqual(len(self.pool), 2)
+        sessions[0].close.assert_called_once_with(force=True)
+        self.assertIs(self.pool.checkout(self.key, idle_timeout=60).session, sessions[2])
+
+    @patch('condoor.sessionpool.time')
+    def test_idle_eviction(self, time_mock):
+        """SessionPool: Test the idle and dead sessions are evicted"""
+        time_mock.time.return_value = 100
+        idle, dead, alive = make_session(), make_session(alive=False), make_session()
+        self.pool.checkin(self.key, idle, self.jumphosts, max_idle=4)
+        time_mock.time.return_value = 200
+        self.pool.checkin(self.key, dead, self.jumphosts, max_idle=4)
+        self.pool.checkin(self.key, alive, self.jumphosts, max_idle=4)
+        time_mock.time.return_value = 250
+        self.assertIs(self.pool.checkout(self.key, idle_timeout=60).session, alive)
+        idle.close.assert_called_once_with(force=True)
+        dead.close.assert_called_once_with(force=True)
+        self.assertEqual(len(self.pool), 0)
@@ -0,0 +1,89 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import os
+import shutil
+import socket
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from condoor.protocols.ssh import SSH, _C
+
+
+class TestControlMaster(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        config = dict(_C['control_master'], enabled=True, directory=self.directory)
+        patcher = patch.dict(_C, {'control_master': config, 'transport': 'spawn'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        self.device = Mock()
+        self.device.node_info.hostname = "jumphost"
+        self.device.node_info.port = 22
+        self.device.node_info.username = "admin"
+        self.device.node_info.transport = None
+        self.device.chain.devices = [self.device, Mock()]
+
+    def test_control_options(self):
+        """SSH: Test the ControlMaster options for the first hop"""
+        ssh = SSH(self.device)
+        command = ssh.get_command()
+        self.assertIn("-o ControlMaster=auto -o ControlPath={} ".format(ssh.control_path), command)
+        self.assertTrue(ssh.control_path.startswith(self.directory))
+        self.assertTrue(command.endswith("-2 -p 22 admin@jumphost"))
+
+    def test_not_first_hop(self):
+        """SSH: Test no ControlMaster options for the next hops"""
+        self.device.chain.devices = [Mock(), self.device]
+        command = SSH(self.device).get_command()
+        self.assertNotIn("ControlMaster", command)
+
+    def test_stale_socket_removed(self):
+        """SSH: Test the stale control socket is removed"""
+        ssh = SSH(self.device)
+        ssh.get_command()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(ssh.control_path)
+        sock.close()
+        ssh.get_command()
+        self.assertFalse(os.path.exists(ssh.control_path))
+
+    def test_running_master_reused(self):
+        """SSH: Test the control socket of the running master is kept"""
+        ssh = SSH(self.device)
+        ssh.get_command()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(ssh.control_path)
+        sock.listen(1)
+        self.addCleanup(sock.close)
+        ssh.get_command()
+        self.assertTrue(os.path.exists(ssh.control_path))
@@ -0,0 +1,113 @@
+# =============================================================================
+#
+# Copyright (c)  2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import pexpect
+from mock import Mock
+
+from condoor.fsm import FSM
+from condoor.trace import FSMStats, JSONLinesSink, LatencyHistogram, MemorySink, Transition
+
+
+class TestLatencyHistogram(TestCase):
+    def test_record(self):
+        histogram = LatencyHistogram()
+        for value in (0.0005, 0.003, 0.003, 0.04, 7):
+            histogram.record(value)
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.total, 7.0465)
+        self.assertEqual(histogram.max, 7)
+        self.assertEqual(histogram.percentile(50), 0.005)
+        self.assertEqual(histogram.percentile(100), 7)
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(0.1)
+        second.record(2)
+        first.merge(second)
+        self.assertEqual(first.count, 2)
+        self.assertEqual(first.max, 2)
+
+
+class TestFSMStats(TestCase):
+    def test_summary(self):
+        stats = FSMStats()
+        stats.record("FAST", 0, 0.01)
+        stats.record("SLOW", 1, 5)
+        stats.record("SLOW", 1, 3)
+        summary = stats.summary()
+        self.assertEqual([(item['fsm'], item['state'], item['count']) for item in summary],
+                         [("SLOW", 1, 2), ("FAST", 0, 1)])
+        self.assertEqual(summary[0]['mean'], 4)
+        self.assertEqual(stats.histogram("FAST", 0).count, 1)
+        self.assertIsNone(stats.histogram("FAST", 1))
+
+
+class TestTraceSink(TestCase):
+    def test_fsm_trace(self):
+        """Trace: Test the FSM emits the transition records"""
+        device = Mock()
+        device.ctrl.hostname = "router"
+        device.ctrl.before = "output"
+        device.ctrl.after = "router#"
+        device.ctrl.expect.side_effect = [0, 1]
+        device.chain.connection.fsm_stats = FSMStats()
+        device.chain.connection.trace_sink = sink = MemorySink()
+
+        events = ["router#", pexpect.TIMEOUT]
+        transitions = [
+            ("router#", [0], 1, None, 0),
+            (pexpect.TIMEOUT, [1], -1, lambda ctx: True, 0),
+        ]
+        self.assertTrue(FSM("TRACE", device, events, transitions, timeout=1).run())
+
+        self.assertEqual([(t.fsm, t.device, t.state, t.event, t.next_state) for t in sink.transitions],
+                         [("TRACE", "router", 0, 0, 1), ("TRACE", "router", 1, 1, -1)])
+        self.assertEqual(sink.transitions[0].pattern, "'router#'")
+        self.assertEqual(sink.transitions[0].bytes, 13)
+        self.assertEqual(sink.transitions[1].pattern, "TIMEOUT")
+        self.assertEqual(device.chain.connection.fsm_stats.histogram("TRACE", 1).count, 1)
+
+    def test_json_lines(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "trace.jsonl")
+            sink = JSONLinesSink(filename)
+            sink.emit(Transition("FSM", "router", 0, 1, "'#'", -1, 0.5, 10, 0.1, 1000.0))
+            sink.close()
+            with open(filename) as trace:
+                record = json.loads(trace.readline())
+            self.assertEqual(record['fsm'], "FSM")
+            self.assertEqual(record['response_time'], 0.5)
+        finally:
+            shutil.rmtree(directory)
@@ -3,12 +3,9 @@ from condoor.connection import _CACHE_FILE
 
 
 def remove_cache_file():
-    try:
-        os.remove(_CACHE_FILE)
-    except OSError:
-        pass
-
-    try:
-        os.remove(_CACHE_FILE + '.db')
-    except OSError:
-        pass
+    # the file names depend on the cache backend and the dbm module used by shelve
+    for suffix in ('', '.db', '.dat', '.dir', '.bak', '.lock', '.sqlite', '.sqlite-wal', '.sqlite-shm'):
+        try:
+            os.remove(_CACHE_FILE + suffix)
+        except OSError:
+            pass